@@ -2,9 +2,13 @@
 """
 This module defines the card and deck classes for the Mus game.
 It includes card definitions, ranking, and value assignments.
+
+Cards are identified by an integer id in 0..39, where the rank index is
+id // 4 and the suit index is id % 4.
 """
 
-import random
+import numpy as np
+from shuffle import fisher_yates_u8, seed_state, seed_states, shuffle_batch
 
 # Define the ranks and their ordering for the Mus game.
 # Note: In Mus, the ranking order (from highest to lowest) is:
@@ -42,28 +46,141 @@ VALUES = {
 # Define suits. In Mus, the suit does not affect the ranking.
 SUITS = ['Oros', 'Copas', 'Espadas', 'Bastos']
 
+NUM_CARDS = len(RANKS) * len(SUITS)
+
+# Lookup tables indexed by rank id (position in RANKS).
+RANK_ID = {rank: i for i, rank in enumerate(RANKS)}
+ORDER_ARR = np.array([ORDER[rank] for rank in RANKS], dtype=np.uint8)
+VALUE_ARR = np.array([VALUES[rank] for rank in RANKS], dtype=np.uint8)
+
+# Lookup tables indexed by card id.
+ORDER_BY_ID = np.repeat(ORDER_ARR, len(SUITS))
+VALUE_BY_ID = np.repeat(VALUE_ARR, len(SUITS))
+
+# An unshuffled deck, copied by every new Deck.
+_DECK_TEMPLATE = np.arange(NUM_CARDS, dtype=np.uint8)
+
+def rank_of(card_id):
+    """Return the rank index (into RANKS) of a card id."""
+    return card_id >> 2
+
+def suit_of(card_id):
+    """Return the suit index (into SUITS) of a card id."""
+    return card_id & 3
+
 class Card:
+    __slots__ = ('rank', 'suit', 'order', 'value', '_str')
+
     def __init__(self, rank, suit):
         self.rank = rank
         self.suit = suit
         self.order = ORDER[rank]
         self.value = VALUES[rank]
+        self._str = f"{rank} of {suit}"
 
     def __str__(self):
-        return f"{self.rank} of {self.suit}"
+        return self._str
 
     def __repr__(self):
-        return self.__str__()
+        return self._str
+
+# Card objects indexed by card id, used when a readable form is needed.
+CARDS = tuple(Card(RANKS[rank_of(i)], SUITS[suit_of(i)]) for i in range(NUM_CARDS))
+
+class DeckPool:
+    """
+    A pool of pre-shuffled decks stored as a single (size, NUM_CARDS) uint8 array.
+    Decks are handed out one row at a time; the whole pool is reshuffled in one
+    pass when it runs out.
+    """
+    def __init__(self, size=10_000):
+        self.pool = np.tile(_DECK_TEMPLATE, (size, 1))
+        self.cursor = 0
+        # One generator state per row, so every deck has its own random stream.
+        self._rng_states = seed_states(size)
+        self.refill()
+
+    def refill(self):
+        """Reshuffle every deck in the pool and rewind the cursor."""
+        shuffle_batch(self.pool, self._rng_states)
+        self.cursor = 0
+
+    def next_deck(self):
+        """Return a copy of the next pre-shuffled deck."""
+        if self.cursor >= len(self.pool):
+            self.refill()
+        cards = self.pool[self.cursor].copy()
+        self.cursor += 1
+        return cards
 
 class Deck:
-    def __init__(self):
-        self.cards = [Card(rank, suit) for suit in SUITS for rank in RANKS if rank in RANKS]
+    """
+    A deck kept in a single fixed buffer of card ids.
+
+    The buffer is laid out as [discard pile | dealt slots | undealt cards]:
+    cards are dealt from self._cursor towards self._end, and discarded cards are
+    written back into the front of the buffer, over slots whose cards have
+    already been dealt. Reshuffling the discard pile into the deck is then an
+    in-place compaction and shuffle of the buffer, with no new allocation.
+    """
+    def __init__(self, pool=None):
+        """
+        :param pool: Optional DeckPool to take an already shuffled deck from.
+        """
+        if pool is not None:
+            self.cards = pool.next_deck()
+        else:
+            self.cards = _DECK_TEMPLATE.copy()
+        self._rng_state = seed_state()
+        # Index of the next card to deal; cards before it have been dealt.
+        self._cursor = 0
+        # End of the undealt cards.
+        self._end = len(self.cards)
+        # Size of the discard pile held at the front of the buffer.
+        self._num_discarded = 0
     
     def shuffle(self):
-        random.shuffle(self.cards)
+        """Shuffle the whole deck and start dealing from the top again."""
+        fisher_yates_u8(self.cards, self._rng_state)
+        self._cursor = 0
+        self._end = len(self.cards)
+        self._num_discarded = 0
+
+    def load(self, cards):
+        """Replace the deck with an already shuffled array of card ids and deal from its top."""
+        self.cards[:] = cards
+        self._cursor = 0
+        self._end = len(self.cards)
+        self._num_discarded = 0
+
+    def cards_left(self):
+        """Return the number of cards not yet dealt."""
+        return self._end - self._cursor
+
+    def discard(self, cards):
+        """
+        Add previously dealt cards to the discard pile.
+        The pile must stay within the slots dealt from since the last shuffle,
+        reshuffle or load: discard at most as many cards as have been dealt since
+        then, less those already discarded (MusGame draws before it discards).
+        """
+        start = self._num_discarded
+        self._num_discarded += len(cards)
+        self.cards[start:self._num_discarded] = cards
+
+    def reshuffle(self):
+        """Shuffle the discard pile back in with the undealt cards."""
+        left = self.cards_left()
+        start = self._num_discarded
+        # Move the undealt cards next to the discard pile, then shuffle both.
+        self.cards[start:start + left] = self.cards[self._cursor:self._end]
+        self._end = start + left
+        fisher_yates_u8(self.cards[:self._end], self._rng_state)
+        self._cursor = 0
+        self._num_discarded = 0
 
     def deal(self, num_cards):
-        """Deals num_cards from the deck."""
-        dealt_cards = self.cards[:num_cards]
-        self.cards = self.cards[num_cards:]
+        """Deals num_cards from the deck as an array of card ids."""
+        dealt_cards = self.cards[self._cursor:self._cursor + num_cards].copy()
+        self._cursor += num_cards
         return dealt_cards
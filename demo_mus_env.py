@@ -8,12 +8,75 @@ with a focus on the signaling mechanism.
 """
 
 from mus_env import MusEnv
+from game_logic import Phase
+import argparse
 import numpy as np
 import time
 
+# Step limit per episode, to avoid infinite loops.
+MAX_STEPS = 20
+
+ACTION_NAMES = {0: "Discard", 1: "Bet", 2: "Raise", 3: "Call", 4: "Pass", 5: "Signal"}
+
+def sample_episode(rng, num_players):
+    """
+    Sample all the randomness for one episode up front.
+    Every array is indexed by [step, player].
+    """
+    return {
+        'u01': rng.random((MAX_STEPS, num_players)),
+        # Discard masks are packed as 4-bit integers (bit i discards card i).
+        'discard': rng.integers(0, 16, size=(MAX_STEPS, num_players), dtype=np.uint8),
+        'signal': rng.integers(1, 4, size=(MAX_STEPS, num_players)),
+        'action': rng.integers(1, 5, size=(MAX_STEPS, num_players)),
+        'amount': rng.integers(1, 4, size=(MAX_STEPS, num_players)),
+    }
+
+def _build_mus_actions(num_players, step, rands):
+    """In mus phase, randomly decide to discard (50%) or signal."""
+    action_types = np.where(rands['u01'][step] < 0.5, 0, 5)
+    return {
+        player: {'action_type': action_type, 'cards': cards, 'signal': signal}
+        for player, (action_type, cards, signal) in enumerate(zip(
+            action_types.tolist(),
+            rands['discard'][step].tolist(),  # Random discard patterns
+            rands['signal'][step].tolist()))  # Random signals 1-3
+    }
+
+def _build_play_actions(num_players, step, rands):
+    """In play phase, randomly choose a betting action (bet, raise, call, pass)."""
+    action_types = rands['action'][step]
+    amounts = np.where(action_types <= 2, rands['amount'][step], 0)
+    return {
+        player: {'action_type': action_type, 'amount': amount}
+        for player, (action_type, amount) in enumerate(zip(action_types.tolist(), amounts.tolist()))
+    }
+
+def _build_default_actions(num_players, step, rands):
+    """Default action for other phases."""
+    return {player: {'action_type': 0} for player in range(num_players)}
+
+# Action builders keyed by game phase.
+ACTION_BUILDERS = {Phase.MUS: _build_mus_actions, Phase.PLAY: _build_play_actions}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run random agents in the Mus environment.")
+    parser.add_argument('--fast', action='store_true',
+                        help="Do not pause between steps (for profiling).")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Skip per-step rendering and printing; only print episode summaries.")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    sleep = (lambda _: None) if args.fast else time.sleep
+    verbose = not args.quiet
+
     # Create the environment with a 20% chance of signal interception
     env = MusEnv(num_players=4, signal_intercept_chance=0.2)
+    num_players = env.num_players
+    # A single PCG64 generator drives all of the demo's random choices.
+    rng = np.random.default_rng()
     
     # Run several episodes
     for episode in range(3):
@@ -24,83 +87,64 @@ def main():
         observations = env.reset()
         
         # Print initial state
-        env.render()
+        if verbose:
+            env.render()
         
-        done = {'__all__': False}
+        done = False
         step_count = 0
+
+        rands = sample_episode(rng, num_players)
         
         # Run until episode is done
-        while not done['__all__'] and step_count < 20:  # Limit steps to avoid infinite loops
-            print(f"\nStep {step_count+1}")
+        while not done and step_count < MAX_STEPS:
+            if verbose:
+                print(f"\nStep {step_count+1}")
             
-            # Generate random actions for each player
-            actions = {}
-            for player in range(env.num_players):
-                # Create appropriate actions based on the game phase
-                if env.game.current_phase == 'mus':
-                    # In mus phase, randomly decide to discard or signal
-                    if np.random.random() < 0.5:  # 50% chance to discard
-                        actions[player] = {
-                            'action_type': 0,  # Discard
-                            'cards': np.random.randint(0, 2, size=4).tolist()  # Random discard pattern
-                        }
-                    else:
-                        # Increase probability of signaling to demonstrate the feature
-                        actions[player] = {
-                            'action_type': 5,  # Signal
-                            'signal': np.random.randint(1, 4)  # Random signal 1-3
-                        }
-                elif env.game.current_phase == 'play':
-                    # In play phase, randomly choose a betting action
-                    action_type = np.random.choice([1, 2, 3, 4])  # bet, raise, call, pass
-                    actions[player] = {
-                        'action_type': action_type,
-                        'amount': np.random.randint(1, 4) if action_type in [1, 2] else 0
-                    }
-                else:
-                    # Default action for other phases
-                    actions[player] = {'action_type': 0}
+            # Generate random actions for all players with the builder for the current phase.
+            build_actions = ACTION_BUILDERS.get(env.game.current_phase, _build_default_actions)
+            actions = build_actions(num_players, step_count, rands)
             
             # Take a step in the environment
-            observations, rewards, done, info = env.step(actions)
+            observations, rewards, dones, info = env.step(actions)
+            done = bool(dones.all())
             
-            # Print the actions taken
-            print("Actions taken:")
-            for player, action in actions.items():
-                action_names = {0: "Discard", 1: "Bet", 2: "Raise", 3: "Call", 4: "Pass", 5: "Signal"}
-                action_type = action.get('action_type', 0)
-                action_name = action_names.get(action_type, "Unknown")
+            if verbose:
+                # Print the actions taken
+                print("Actions taken:")
+                for player, action in actions.items():
+                    action_type = action.get('action_type', 0)
+                    action_name = ACTION_NAMES.get(action_type, "Unknown")
+                    
+                    if action_type == 0 and 'cards' in action:  # Discard
+                        mask = [(action['cards'] >> i) & 1 for i in range(4)]
+                        print(f"Player {player}: {action_name} cards {mask}")
+                    elif action_type == 5:  # Signal
+                        print(f"Player {player}: {action_name} {action.get('signal', 0)}")
+                    elif action_type in [1, 2]:  # Bet or Raise
+                        print(f"Player {player}: {action_name} amount {action.get('amount', 0)}")
+                    else:
+                        print(f"Player {player}: {action_name}")
                 
-                if action_type == 0 and 'cards' in action:  # Discard
-                    print(f"Player {player}: {action_name} cards {action['cards']}")
-                elif action_type == 5:  # Signal
-                    print(f"Player {player}: {action_name} {action.get('signal', 0)}")
-                elif action_type in [1, 2]:  # Bet or Raise
-                    print(f"Player {player}: {action_name} amount {action.get('amount', 0)}")
-                else:
-                    print(f"Player {player}: {action_name}")
-            
-            # Render the environment
-            env.render()
-            
-            # Print rewards
-            print("Rewards:")
-            for player, reward in rewards.items():
-                print(f"Player {player}: {reward}")
+                # Render the environment
+                env.render()
+                
+                # Print rewards
+                print("Rewards:")
+                for player, reward in enumerate(rewards):
+                    print(f"Player {player}: {reward}")
             
-            # Print intercepted signals information
-            if hasattr(env.game, 'step') and callable(env.game.step):
-                intercepted_info = env.game.step({})  # Get information about intercepted signals
+                # Print intercepted signals information
+                intercepted_info = info['intercepted']
                 if intercepted_info:
                     print("\nIntercepted Signals:")
-                    for sender, info in intercepted_info.items():
-                        print(f"Player {sender}'s signal {info['signal']} was intercepted by players {info['intercepted_by']}")
+                    for sender, details in intercepted_info.items():
+                        print(f"Player {sender}'s signal {details['signal']} was intercepted by players {details['intercepted_by']}")
             
             step_count += 1
-            time.sleep(1)  # Slow down for readability
+            sleep(1)  # Slow down for readability
         
         print(f"\nEpisode {episode+1} complete after {step_count} steps")
-        if done['__all__']:
+        if done:
             print("Game reached terminal state")
             # Print final scores
             print(f"Final scores - Team 0: {env.game.scores[0]}, Team 1: {env.game.scores[1]}")
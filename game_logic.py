@@ -1,33 +1,196 @@
 # game_logic.py
 """
-This module contains the core logic for the Mus game.
-It now includes:
+This module contains the core logic for the Mus game, including:
   - Detailed betting rounds with multiple bet levels (bet, raise, call, pass, ordago).
   - Hand evaluation integration for the play categories: grande, chica, pares, and juego.
   - Turn order management and a simplified scoring and terminal state logic.
-  
-Note: This implementation is a simplified demonstration and can be further refined.
-"""
-
-import random
-from cards import Deck
-from hand_evaluation import evaluate_grande, evaluate_chica, evaluate_pairs, evaluate_juego
-
-# game_logic.py
-"""
-This module contains the core logic for the Mus game, including:
-  - Detailed betting rounds with nuanced actions.
-  - Hand evaluation integration.
   - Special cases handling:
       - Reshuffling the discard pile when the deck runs out.
       - Refined "Órdago" (all-in) resolution with immediate hand reveal.
       - Rule exceptions regarding when hands are shown.
   - Full match logic that loops over partial games and tracks cumulative scores.
+
+Note: This implementation is a simplified demonstration and can be further refined.
 """
 
-import random
-from cards import Deck
-from hand_evaluation import evaluate_grande, evaluate_chica, evaluate_pairs, evaluate_juego
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from enum import IntEnum
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+from numba import njit
+from cards import Deck, ORDER_BY_ID, VALUE_BY_ID
+from hand_evaluation import category_keys, GRANDE, CHICA, PARES, JUEGO
+
+# Choices for the simulated betting actions.
+BETTING_ACTIONS = ('bet', 'raise', 'call', 'pass')
+# Number of passes around the table whose simulated actions are drawn at once.
+BETTING_BLOCK = 8
+
+# Value of BettingRound.bets for a player who has not bet.
+NO_BET = -1
+
+# Column of MusGame.hand_keys holding each play category.
+_CATEGORY_COLUMN = {'grande': GRANDE, 'chica': CHICA, 'pares': PARES, 'juego': JUEGO}
+
+# Betting kernels shared by MusGame and the compiled game step (game_logic_numba).
+
+@njit(cache=True)
+def round_complete(bets, active):
+    """Compiled BettingRound.is_round_complete."""
+    num_active = 0
+    first = NO_BET
+    for player in range(bets.shape[0]):
+        if not active[player]:
+            continue
+        num_active += 1
+        if bets[player] == NO_BET:
+            continue
+        if first == NO_BET:
+            first = bets[player]
+        elif bets[player] != first:
+            return False
+    return num_active <= 1 or first != NO_BET
+
+@njit(cache=True)
+def simulate_betting(order, bets, active, current_bet, last_raiser, action_idx, amounts):
+    """
+    Apply one block of simulated passes around the table (see
+    run_detailed_betting_round) to a betting round's arrays, with the same
+    effect as BettingRound.player_action. order holds the player IDs in betting
+    order; action_idx[i, seat] indexes BETTING_ACTIONS and amounts[i, seat] is the
+    raise amount; last_raiser is -1 for none. Returns (current_bet, last_raiser,
+    complete), stopping as soon as the round is complete.
+    """
+    for i in range(action_idx.shape[0]):
+        for seat in range(order.shape[0]):
+            player = order[seat]
+            if not active[player]:
+                continue
+            action = action_idx[i, seat]
+            if action == 0:  # bet
+                if current_bet == 0:
+                    current_bet = 1
+                bets[player] = current_bet
+                last_raiser = player
+            elif action == 1:  # raise
+                current_bet += amounts[i, seat]
+                bets[player] = current_bet
+                last_raiser = player
+            elif action == 2:  # call
+                bets[player] = current_bet
+            else:  # pass
+                active[player] = False
+            if round_complete(bets, active):
+                return current_bet, last_raiser, True
+    return current_bet, last_raiser, False
+
+@njit(cache=True)
+def betting_winner(order, bets):
+    """Player with the highest bet, ties going to the earliest in order; -1 if nobody bet."""
+    winner = -1
+    for player in order:
+        if bets[player] != NO_BET and (winner < 0 or bets[player] > bets[winner]):
+            winner = player
+    return winner
+
+class Phase(IntEnum):
+    """Game phases; the integer values are also used in observations."""
+    DEAL = 0
+    MUS = 1
+    PLAY = 2
+    SCORING = 3
+
+# Human-readable phase names, indexed by Phase.
+PHASE_NAMES = ('deal', 'mus', 'play', 'scoring')
+
+# Layout of the flat observation written by MusGame.get_observation_array.
+OBS_HAND = slice(0, 4)  # Card orders of the player's hand.
+OBS_PHASE = 4
+OBS_PARTNER_SIGNAL = 5
+OBS_SCORES = slice(6, 8)
+OBS_CURRENT_BET = 8  # 0 outside the play phase.
+OBS_CURRENT_CATEGORY = 9  # Index into play_categories, -1 outside the play phase.
+# num_players entries from here: the signal intercepted from each player, or 0.
+OBS_INTERCEPTED = 10
+
+def observation_size(num_players):
+    """Length of the flat observation for a game of num_players."""
+    return OBS_INTERCEPTED + num_players
+
+def observation_views(obs):
+    """
+    Split an (..., observation_size) array of flat observations into a dict of
+    per-field views (no copies), keyed like MusGame.get_observation.
+    """
+    return {
+        'hand': obs[..., OBS_HAND],
+        'phase': obs[..., OBS_PHASE],
+        'partner_signal': obs[..., OBS_PARTNER_SIGNAL],
+        'scores': obs[..., OBS_SCORES],
+        'current_bet': obs[..., OBS_CURRENT_BET],
+        'current_category': obs[..., OBS_CURRENT_CATEGORY],
+        'intercepted_signals': obs[..., OBS_INTERCEPTED:],
+    }
+
+def actions_to_arrays(actions, num_players, default_amount=1):
+    """
+    Convert per-player action dicts (see MusGame.step) into parallel arrays indexed by
+    player ID: action_types (int8, -1 for no action), amounts (int8), cards (uint8
+    (num_players, 4) discard mask) and signals (int8).
+    actions is either a mapping from player ID to action or a sequence in player order.
+    A discard without 'cards' or a signal without 'signal' counts as no action.
+    """
+    action_types = np.full(num_players, -1, dtype=np.int8)
+    amounts = np.zeros(num_players, dtype=np.int8)
+    cards = np.zeros((num_players, 4), dtype=np.uint8)
+    signals = np.zeros(num_players, dtype=np.int8)
+    for player, action in (actions.items() if hasattr(actions, 'items') else enumerate(actions)):
+        action_type = action.get('action_type')
+        if action_type is None:
+            continue
+        if action_type == 0:
+            if 'cards' not in action:
+                continue
+            mask = action['cards']
+            if isinstance(mask, (int, np.integer)):
+                # Packed bitmask (e.g., 0b1010): bit i discards card i.
+                cards[player] = [(mask >> i) & 1 for i in range(4)]
+            else:
+                # Binary mask (e.g., [0, 1, 0, 1]).
+                cards[player, :len(mask)] = np.asarray(mask) == 1
+        elif action_type == 5:
+            if 'signal' not in action:
+                continue
+            signals[player] = action['signal']
+        action_types[player] = action_type
+        amounts[player] = action.get('amount', default_amount)
+    return action_types, amounts, cards, signals
+
+@lru_cache(maxsize=None)
+def _seat_tables(num_players, mano):
+    """
+    Team and turn-order lookups for a table of num_players with the given mano.
+    There are only num_players distinct tables per game size, so each one is
+    built once and shared (the arrays are read-only).
+    team0 is the mano and the player seated opposite ((mano + 2) % num_players);
+    team1 is everyone else.
+    """
+    team0 = {mano, (mano + 2) % num_players}
+    team_of = np.array([0 if p in team0 else 1 for p in range(num_players)], dtype=np.int8)
+    team_members = tuple(np.flatnonzero(team_of == team) for team in (0, 1))
+    for array in (team_of,) + team_members:
+        array.flags.writeable = False
+    # A player's partner is the other member of their team (themselves if there is none).
+    partner_of = tuple(next((int(q) for q in team_members[team_of[p]] if q != p), p)
+                       for p in range(num_players))
+    opponents_of = tuple(tuple(int(q) for q in team_members[1 - team_of[p]])
+                         for p in range(num_players))
+    # Clockwise order starting from mano.
+    turn_order = tuple((mano + i) % num_players for i in range(num_players))
+    return team_of, team_members, partner_of, opponents_of, turn_order
 
 class BettingRound:
     def __init__(self, players, play_type, initial_bet=1):
@@ -38,12 +201,28 @@ class BettingRound:
         :param initial_bet: Starting bet value.
         """
         self.players = players
+        self._order = np.asarray(players)
+        self.initial_bet = initial_bet
+        # Bets and active flags are indexed by player ID (players are 0..len(players)-1).
+        # Bets are always amounts; NO_BET means no bet yet. An ordago is tracked
+        # separately by is_ordago / ordago_player.
+        self.bets = np.full(len(players), NO_BET, dtype=np.int16)
+        self.active = np.ones(len(players), dtype=bool)  # Tracks players still in the round.
+        self.reset(play_type)
+
+    def reset(self, play_type):
+        """
+        Start a new betting round for another play category, reusing the arrays.
+        :param play_type: The play category (e.g., 'grande', 'chica', etc.).
+        """
         self.play_type = play_type
-        self.current_bet = initial_bet
-        self.bets = {p: None for p in players}
-        self.active = {p: True for p in players}  # Tracks players still in the round.
+        self.current_bet = self.initial_bet
+        self.bets.fill(NO_BET)
+        self.active.fill(True)
         self.last_raiser = None
         self.finished = False
+        self.is_ordago = False
+        self.ordago_player = None
 
     def player_action(self, player, action, amount=0):
         """
@@ -73,8 +252,10 @@ class BettingRound:
             # Player declines further betting.
             self.active[player] = False
         elif action == 'ordago':
-            # Player calls an all-in bet.
-            self.bets[player] = 'ordago'
+            # Player calls an all-in bet; the first ordago stands.
+            if not self.is_ordago:
+                self.is_ordago = True
+                self.ordago_player = player
             self.finished = True
 
     def is_round_complete(self):
@@ -84,13 +265,7 @@ class BettingRound:
           - Only one active player remains, or
           - All active players have bet the same amount (and no further raises).
         """
-        active_players = [p for p, is_active in self.active.items() if is_active]
-        if len(active_players) <= 1:
-            return True
-        active_bets = [self.bets[p] for p in active_players if self.bets[p] is not None and self.bets[p] != 'ordago']
-        if active_bets and len(set(active_bets)) == 1:
-            return True
-        return False
+        return round_complete(self.bets, self.active)
 
     def get_winner(self):
         """
@@ -98,26 +273,111 @@ class BettingRound:
         If any player called 'ordago', return that player.
         Otherwise, the player with the highest bet wins.
         """
-        for p, bet in self.bets.items():
-            if bet == 'ordago':
-                return p, 'ordago'
-        valid_bets = {p: bet for p, bet in self.bets.items() if bet is not None}
-        if valid_bets:
-            winner = max(valid_bets, key=valid_bets.get)
-            return winner, self.current_bet
-        return None, None
+        if self.is_ordago:
+            return self.ordago_player, 'ordago'
+        winner = betting_winner(self._order, self.bets)
+        if winner < 0:
+            return None, None
+        return int(winner), self.current_bet
 
 
 class MusGame:
-    def __init__(self, num_players=4, target_score=40, signal_intercept_chance=0.2):
+    def __init__(self, num_players=4, target_score=40, signal_intercept_chance=0.2, deck_pool=None,
+                 shuffle=True):
+        """
+        :param deck_pool: Optional DeckPool to take the first (already shuffled) deck from.
+        :param shuffle: If False, the deck is left unshuffled and no pool deck is taken,
+            for callers that load one with reset_from_deck() before dealing.
+        """
         self.num_players = num_players
         self.target_score = target_score  # e.g., 40 stones for a complete game.
-        self.deck = Deck()
+        if not shuffle:
+            self.deck = Deck()
+        else:
+            # Decks taken from a DeckPool are already shuffled.
+            self.deck = Deck(pool=deck_pool)
+            if deck_pool is None:
+                self.deck.shuffle()
+        # Card ids of each player's hand, one row per player.
+        self.hands = np.zeros((num_players, 4), dtype=np.uint8)
+        # Card orders and values of each hand, kept in step with self.hands.
+        self.hand_orders = np.zeros((num_players, 4), dtype=np.int8)
+        self.hand_values = np.zeros((num_players, 4), dtype=np.int8)
+        # Category keys of each hand (see hand_evaluation.category_keys), also kept in step.
+        self.hand_keys = np.zeros((num_players, 4), dtype=np.int32)
+        self.scores = np.zeros(2, dtype=np.int16)  # For two teams: team0 and team1.
+        # Store the most recent covert signal for each player
+        self.covert_signals = np.zeros(num_players, dtype=np.int8)
+        # Store which signals have been intercepted: bit q of intercepted_signals[p] is set
+        # when player p has intercepted a signal from player q (up to 8 players).
+        self.intercepted_signals = np.zeros(num_players, dtype=np.uint8)
+        # Chance that a signal will be intercepted by opponents
+        self.signal_intercept_chance = signal_intercept_chance
+        # Random source for simulated betting and signal interception.
+        self._rng = np.random.default_rng()
+        # Observation versions: self._version changes with state every player sees
+        # (phase, scores, signals) and self._player_versions[p] with player p's hand.
+        # get_observation_array only rebuilds a row whose versions have moved on.
+        self._version = 0
+        self._player_versions = [0] * num_players
+        self._obs_stamps = [None] * num_players
+        # Flat observation rows reused by get_observation_array, one per player.
+        self._obs_buf = np.zeros((num_players, observation_size(num_players)), dtype=np.int16)
+        self._obs_rows = tuple(self._obs_buf)
+        # Everything else starts as reset() leaves it.
+        self._clear_state()
+
+    @property
+    def current_phase(self):
+        return self._phase
+
+    @current_phase.setter
+    def current_phase(self, phase):
+        # The phase (and the state that changes with it) is visible to every player.
+        self._phase = phase
+        self._version += 1
+
+    def observation_version(self, player):
+        """Return a stamp that changes whenever the player's observation may have changed."""
+        return self._version, self._player_versions[player]
+
+    def shared_observation_version(self):
+        """
+        Return a stamp that changes whenever the part of the observations every
+        player sees (phase, scores, signals) may have changed. While it stays the
+        same, only the hands of players who acted can have changed.
+        """
+        return self._version
+
+    def reset(self):
+        """
+        Return the game to its freshly constructed state (phase DEAL, zero scores)
+        so it can be reused for another game: the deck is reshuffled in place and
+        the per-player arrays are re-zeroed rather than reallocated.
+        """
         self.deck.shuffle()
-        self.hands = {player: [] for player in range(num_players)}
-        self.discard_pile = []
-        self.current_phase = 'deal'  # Possible phases: 'deal', 'mus', 'play', 'scoring'
-        self.scores = {0: 0, 1: 0}  # For two teams: team0 and team1.
+        self._clear_state()
+
+    def reset_from_deck(self, cards):
+        """
+        Like reset(), but take the next game's deck from an already shuffled array
+        of card ids (e.g. a DeckPool row) instead of shuffling. initial_deal() then
+        deals the hands from the top of that deck.
+        """
+        self.deck.load(cards)
+        self._clear_state()
+
+    def _clear_state(self):
+        """
+        Re-zero everything but the deck: used by __init__ (after the arrays are
+        allocated), reset() and reset_from_deck().
+        """
+        self.hands.fill(0)
+        self.hand_orders.fill(0)
+        self.hand_values.fill(0)
+        self.hand_keys.fill(0)
+        self.current_phase = Phase.DEAL  # Possible phases: DEAL, MUS, PLAY, SCORING
+        self.scores.fill(0)
         self.mano = None  # The designated "mano" (lead) player.
         self.turn_order = []  # Order of play starting with mano.
         self.current_turn_index = 0
@@ -125,34 +385,34 @@ class MusGame:
         self.play_results = {}  # Will store (winner, final_bet) for each category.
         self.ordago_active = False
         self.ordago_player = None
-        # Store the most recent covert signal for each player
-        self.covert_signals = {player: 0 for player in range(num_players)}
-        # Store which signals have been intercepted
-        self.intercepted_signals = {player: set() for player in range(num_players)}
-        # Chance that a signal will be intercepted by opponents
-        self.signal_intercept_chance = signal_intercept_chance
+        self.covert_signals.fill(0)
+        self.intercepted_signals.fill(0)
+        # Signals intercepted during the most recent step (see step()).
+        self.last_intercepted = {}
+        self._version += 1
 
     def draw_from_deck(self, n):
         """
         Draw n cards from the deck.
         If there are not enough cards, reshuffle the discard pile into the deck.
         """
-        if len(self.deck.cards) < n:
+        if self.deck.cards_left() < n:
             # Reshuffle the discard pile into the deck
-            self.deck.cards.extend(self.discard_pile)
-            random.shuffle(self.deck.cards)
-            self.discard_pile = []
+            self.deck.reshuffle()
         return self.deck.deal(n)
 
     def initial_deal(self):
         """
-        Deal 4 cards to each player, determine mano, and transition to the discard ('mus') phase.
+        Deal 4 cards to each player, determine mano, and transition to the discard (MUS) phase.
         """
-        for player in range(self.num_players):
-            self.hands[player] = self.draw_from_deck(4)
+        # Player p gets the p-th run of 4 cards; orders and values are gathered for all hands at once.
+        self.hands[:] = self.draw_from_deck(4 * self.num_players).reshape(self.num_players, 4)
+        self.hand_orders[:] = ORDER_BY_ID[self.hands]
+        self.hand_values[:] = VALUE_BY_ID[self.hands]
+        self.hand_keys[:] = category_keys(self.hands)
         self.determine_mano()
         self.set_turn_order()
-        self.current_phase = 'mus'
+        self.current_phase = Phase.MUS
         self.hands_revealed = False
 
     def determine_mano(self):
@@ -160,24 +420,31 @@ class MusGame:
         Determine the mano (lead) by having each player reveal one card.
         The highest ranked card (based on order) wins.
         """
-        drawn_cards = {}
-        for player in range(self.num_players):
-            # For simplicity, use the first card of each hand.
-            drawn_cards[player] = self.hands[player][0]
-        highest = -1
-        mano_player = None
-        for player, card in drawn_cards.items():
-            if card.order > highest:
-                highest = card.order
-                mano_player = player
-        self.mano = mano_player
+        # For simplicity, use the first card of each hand; ties go to the lowest player id.
+        self.mano = int(np.argmax(self.hand_orders[:, 0]))
+        self.set_teams()
+
+    def set_teams(self):
+        """
+        Look up the team tables for the current mano (see _seat_tables).
+        """
+        (self.team_of, self.team_members, self.partner_of,
+         self.opponents_of, _) = _seat_tables(self.num_players, self.mano)
+
+    def set_hand(self, player, cards):
+        """Give a player a new hand (array of card ids) and update the order, value and key arrays."""
+        self.hands[player] = cards
+        self._player_versions[player] += 1
+        self.hand_orders[player] = ORDER_BY_ID[cards]
+        self.hand_values[player] = VALUE_BY_ID[cards]
+        self.hand_keys[player] = category_keys(self.hands[player:player + 1])
 
     def set_turn_order(self):
         """
         Set the turn order for the round.
         For 4 players, assume clockwise order starting from mano.
         """
-        self.turn_order = [(self.mano + i) % self.num_players for i in range(self.num_players)]
+        self.turn_order = _seat_tables(self.num_players, self.mano)[4]
         self.current_turn_index = 0
 
     def current_player(self):
@@ -193,17 +460,13 @@ class MusGame:
         Process a discard action: remove the indicated cards from the player's hand,
         draw replacements from the deck, and add discarded cards to the discard pile.
         """
-        new_hand = []
-        discarded = []
-        for idx, card in enumerate(self.hands[player]):
-            if idx in cards_to_discard:
-                discarded.append(card)
-            else:
-                new_hand.append(card)
-        self.hands[player] = new_hand
+        hand = self.hands[player]
+        mask = np.zeros(len(hand), dtype=bool)
+        mask[cards_to_discard] = True
+        discarded = hand[mask]
         new_cards = self.draw_from_deck(len(discarded))
-        self.hands[player].extend(new_cards)
-        self.discard_pile.extend(discarded)
+        self.set_hand(player, np.concatenate((hand[~mask], new_cards)))
+        self.deck.discard(discarded)
 
     def update_covert_signal(self, player, signal):
         """
@@ -214,6 +477,8 @@ class MusGame:
         :param signal: The signal value (0-3)
         :return: A list of players who intercepted the signal (if any)
         """
+        # Signals show up in the partner's and in intercepting opponents' observations.
+        self._version += 1
         if signal == 0:  # No signal
             self.covert_signals[player] = 0
             return []
@@ -221,19 +486,11 @@ class MusGame:
         # Update the player's signal
         self.covert_signals[player] = signal
         
-        # Determine the player's team
-        team0 = {self.mano, (self.mano + 2) % self.num_players}
-        player_team = 0 if player in team0 else 1
-        
-        # Determine opponents (players on the other team)
-        opponents = list(set(range(self.num_players)) - team0) if player_team == 0 else list(team0)
-        
-        # Check if opponents intercept the signal
-        interceptors = []
-        for opponent in opponents:
-            if random.random() < self.signal_intercept_chance:
-                self.intercepted_signals[opponent].add(player)
-                interceptors.append(opponent)
+        # Check if opponents (players on the other team) intercept the signal
+        opponents = self.opponents_of[player]
+        intercepted = self._rng.random(len(opponents)) < self.signal_intercept_chance
+        interceptors = [opponents[i] for i in np.flatnonzero(intercepted)]
+        self.intercepted_signals[interceptors] |= np.uint8(1 << player)
                 
         return interceptors
 
@@ -244,15 +501,7 @@ class MusGame:
         :param player: The player requesting the signal
         :return: The signal from their teammate
         """
-        # Determine the player's team and find their teammate
-        team0 = {self.mano, (self.mano + 2) % self.num_players}
-        if player in team0:
-            partner = self.mano if player != self.mano else (self.mano + 2) % self.num_players
-        else:
-            others = list(set(range(self.num_players)) - team0)
-            partner = others[0] if player == others[1] else others[1]
-            
-        return self.covert_signals.get(partner, 0)
+        return int(self.covert_signals[self.partner_of[player]])
         
     def get_intercepted_signals(self, player):
         """
@@ -262,31 +511,38 @@ class MusGame:
         :return: Dictionary mapping opponent IDs to their signals
         """
         intercepted = {}
-        for opponent in self.intercepted_signals[player]:
-            intercepted[opponent] = self.covert_signals[opponent]
+        mask = int(self.intercepted_signals[player])
+        while mask:
+            # Lowest set bit first.
+            opponent = (mask & -mask).bit_length() - 1
+            mask &= mask - 1
+            intercepted[opponent] = int(self.covert_signals[opponent])
         return intercepted
 
     def run_detailed_betting_round(self, play_type):
         """
-        Run a detailed betting round for a given play category.
+        Run a detailed betting round for a given play category, reusing
+        self.current_betting_round (created in start_play_phase).
         For demonstration purposes, actions are simulated randomly.
         Returns a tuple (winner, final_bet) where final_bet is 'ordago' if an all-in is called.
         """
-        betting_round = BettingRound(self.turn_order, play_type, initial_bet=1)
-        while not betting_round.finished and not betting_round.is_round_complete():
-            for player in self.turn_order:
-                if not betting_round.active[player]:
-                    continue
-                # Simulate an action randomly.
-                action = random.choice(['bet', 'raise', 'call', 'pass'])
-                if action == 'raise':
-                    amount = random.choice([1, 2])
-                    betting_round.player_action(player, action, amount)
-                else:
-                    betting_round.player_action(player, action)
-                if betting_round.is_round_complete():
-                    break
+        betting_round = self.current_betting_round
+        betting_round.reset(play_type)
+        num_seats = len(self.turn_order)
+        last_raiser = -1
+        complete = betting_round.finished or betting_round.is_round_complete()
+        while not complete:
+            # Simulate actions randomly, drawing several passes around the table at once
+            # and playing them in a compiled loop.
+            action_idx = self._rng.integers(0, len(BETTING_ACTIONS), size=(BETTING_BLOCK, num_seats))
+            amounts = self._rng.integers(1, 3, size=(BETTING_BLOCK, num_seats))
+            current_bet, last_raiser, complete = simulate_betting(
+                betting_round._order, betting_round.bets, betting_round.active,
+                betting_round.current_bet, last_raiser, action_idx, amounts)
+            betting_round.current_bet = int(current_bet)
             # In an actual implementation, wait for agent actions here.
+        if last_raiser >= 0:
+            betting_round.last_raiser = int(last_raiser)
         winner, final_bet = betting_round.get_winner()
         if final_bet == 'ordago':
             self.ordago_active = True
@@ -297,12 +553,9 @@ class MusGame:
         """
         Reveal all players' hands.
         This method is called when a round ends or an ordago forces immediate reveal.
+        It only records the reveal (it is reachable from step()); MusEnv.render shows the hands.
         """
         self.hands_revealed = True
-        # In a real environment, this might log or broadcast the full hands.
-        print("Revealing all hands:")
-        for player in range(self.num_players):
-            print(f"Player {player} hand: {self.hands[player]}")
 
     def resolve_ordago(self):
         """
@@ -311,10 +564,8 @@ class MusGame:
         Returns the winning team index (0 or 1).
         """
         self.reveal_hands()
-        team0 = {self.mano, (self.mano + 2) % self.num_players}
-        team1 = set(range(self.num_players)) - team0
-        score0 = sum(sum(card.order for card in self.hands[p]) for p in team0)
-        score1 = sum(sum(card.order for card in self.hands[p]) for p in team1)
+        score0 = int(self.hand_orders[self.team_members[0]].sum())
+        score1 = int(self.hand_orders[self.team_members[1]].sum())
         if score0 > score1:
             return 0
         elif score1 > score0:
@@ -325,74 +576,56 @@ class MusGame:
     def start_play_phase(self):
         """
         Transition to the play phase and execute detailed betting rounds for each play category.
-        After all betting rounds are complete, move to scoring.
+        After all betting rounds are complete, automatically move to scoring.
         """
-        self.current_phase = 'play'
+        self.current_phase = Phase.PLAY
         self.play_categories = ['grande', 'chica', 'pares', 'juego']
         self.play_results = {}
+        # One betting round object is reused (via reset) for every category.
+        self.current_betting_round = BettingRound(self.turn_order, self.play_categories[0], initial_bet=1)
         for play in self.play_categories:
             winner, final_bet = self.run_detailed_betting_round(play)
             self.play_results[play] = (winner, final_bet)
             # If an ordago was called, break immediately.
             if self.ordago_active:
                 break
-        self.current_phase = 'scoring'
+        self.current_phase = Phase.SCORING
         self.score_round()
 
     def score_round(self):
         """
         Evaluate each play category using the hand evaluation functions.
-        Teams (for 4 players):
-          - team0: [mano, (mano+2)%4]
-          - team1: remaining players.
+        Teams come from self.team_of (see _seat_tables): team 0 is the mano and
+        the player seated opposite, team 1 everyone else.
         If an ordago is active, resolve it with immediate hand reveal.
         Otherwise, for each category, if no betting winner exists, compare hand evaluations.
         Each winning category awards 1 stone to the winning team.
         """
-        team0 = {self.mano, (self.mano + 2) % self.num_players}
-        team1 = set(range(self.num_players)) - team0
-
-        round_score_team0 = 0
-        round_score_team1 = 0
+        # Stones won this round, indexed by team.
+        round_scores = [0, 0]
 
         # If an ordago was called, immediately resolve the round.
         if self.ordago_active:
             winning_team = self.resolve_ordago()
-            if winning_team == 0:
-                round_score_team0 = self.target_score  # Award full round win.
-            elif winning_team == 1:
-                round_score_team1 = self.target_score
+            if winning_team is not None:
+                round_scores[winning_team] = self.target_score  # Award full round win.
         else:
             for play in self.play_categories:
-                betting_winner, _ = self.play_results.get(play, (None, None))
-                # Evaluate hands if no clear betting winner.
-                if play == 'grande':
-                    evaluations = {p: evaluate_grande(self.hands[p]) for p in range(self.num_players)}
-                    best_player = max(evaluations, key=evaluations.get)
-                elif play == 'chica':
-                    evaluations = {p: evaluate_chica(self.hands[p]) for p in range(self.num_players)}
-                    best_player = min(evaluations, key=evaluations.get)
-                elif play == 'pares':
-                    evaluations = {p: evaluate_pairs(self.hands[p]) for p in range(self.num_players)}
-                    best_player = max(evaluations, key=evaluations.get)
-                elif play == 'juego':
-                    evaluations = {p: evaluate_juego(self.hands[p]) for p in range(self.num_players)}
-                    best_player = max(evaluations, key=lambda p: evaluations[p])
-                else:
-                    best_player = None
-
-                final_winner = betting_winner if betting_winner is not None else best_player
-
-                if final_winner in team0:
-                    round_score_team0 += 1
-                elif final_winner in team1:
-                    round_score_team1 += 1
+                final_winner, _ = self.play_results.get(play, (None, None))
+                if final_winner is None and play in _CATEGORY_COLUMN:
+                    # Compare the precomputed keys only if betting produced no winner.
+                    # Ties go to the lowest player id.
+                    final_winner = int(np.argmax(self.hand_keys[:, _CATEGORY_COLUMN[play]]))
+
+                if final_winner is None:
+                    continue
+                round_scores[self.team_of[final_winner]] += 1
 
         # Update overall scores for this partial game.
-        self.scores[0] += round_score_team0
-        self.scores[1] += round_score_team1
+        self.scores += round_scores
+        self._version += 1
         # After scoring, transition back to deal for the next partial game.
-        self.current_phase = 'deal'
+        self.current_phase = Phase.DEAL
 
     def is_terminal(self):
         """
@@ -404,27 +637,19 @@ class MusGame:
         """
         Returns the observation for a given player.
         The observation includes:
-          - A numerical representation of the player's hand (using card.order).
+          - A numerical representation of the player's hand (the card orders).
           - The current game phase.
           - The partner's covert signal.
           - Intercepted signals from opponents.
           - Current betting state for the active play category.
           - Scores for both teams.
         """
-        # Convert the player's hand (list of card objects) to a list of numbers.
-        encoded_hand = [card.order for card in self.hands[player]]
-        
-        # Encode the game phase as an integer
-        phase_encoding = {
-            'deal': 0,
-            'mus': 1,
-            'play': 2,
-            'scoring': 3
-        }
+        # The player's hand as a list of card orders.
+        encoded_hand = self.hand_orders[player].tolist()
         
         # Get current betting information if in play phase
         betting_info = {}
-        if self.current_phase == 'play' and hasattr(self, 'current_betting_round'):
+        if self.current_phase == Phase.PLAY and hasattr(self, 'current_betting_round'):
             betting_info = {
                 'current_bet': self.current_betting_round.current_bet,
                 'current_category': self.play_categories.index(self.current_betting_round.play_type) 
@@ -439,14 +664,46 @@ class MusGame:
         
         observation = {
             'hand': encoded_hand,
-            'phase': phase_encoding.get(self.current_phase, 0),
+            'phase': int(self.current_phase),
             'partner_signal': partner_signal,
             'intercepted_signals': intercepted_signals,
-            'scores': [self.scores[0], self.scores[1]],
+            'scores': self.scores.tolist(),
             'betting_info': betting_info
         }
         return observation
 
+    def get_observation_array(self, player):
+        """
+        Write the player's observation into a preallocated int16 array and return it.
+        Holds the same information as get_observation, laid out as described by the
+        OBS_* constants. The same array is returned (and overwritten) on every call
+        for that player, so copy it if it must be kept. It is only rebuilt when
+        observation_version(player) has changed since the last call.
+        """
+        obs = self._obs_rows[player]
+        stamp = (self._version, self._player_versions[player])
+        if self._obs_stamps[player] == stamp:
+            return obs
+        self._obs_stamps[player] = stamp
+        obs[OBS_HAND] = self.hand_orders[player]
+        obs[OBS_PHASE] = self.current_phase
+        obs[OBS_PARTNER_SIGNAL] = self.covert_signals[self.partner_of[player]]
+        obs[OBS_SCORES] = self.scores
+        if self.current_phase == Phase.PLAY and hasattr(self, 'current_betting_round'):
+            obs[OBS_CURRENT_BET] = self.current_betting_round.current_bet
+            obs[OBS_CURRENT_CATEGORY] = self.play_categories.index(self.current_betting_round.play_type)
+        else:
+            obs[OBS_CURRENT_BET] = 0
+            obs[OBS_CURRENT_CATEGORY] = -1
+        obs[OBS_INTERCEPTED:] = 0
+        mask = int(self.intercepted_signals[player])
+        while mask:
+            # Lowest set bit first.
+            opponent = (mask & -mask).bit_length() - 1
+            mask &= mask - 1
+            obs[OBS_INTERCEPTED + opponent] = self.covert_signals[opponent]
+        return obs
+
     def get_reward(self, player):
         """
         Returns the reward for a given player.
@@ -454,29 +711,21 @@ class MusGame:
         """
         return 0
 
-    def start_play_phase(self):
+    def get_rewards(self, out):
         """
-        Transition to the play phase and execute detailed betting rounds for each play category.
-        After all betting rounds are complete, automatically move to scoring.
+        Write every player's reward (see get_reward) into out, an array indexed by
+        player ID, and return it.
+        Placeholder: currently all zeros until the game is terminal.
         """
-        self.current_phase = 'play'
-        self.play_categories = ['grande', 'chica', 'pares', 'juego']
-        self.play_results = {}
-        for play in self.play_categories:
-            winner, final_bet = self.run_detailed_betting_round(play)
-            self.play_results[play] = (winner, final_bet)
-            # If an ordago was called, break immediately.
-            if self.ordago_active:
-                break
-        self.current_phase = 'scoring'
-        self.score_round()
+        out.fill(0)
+        return out
 
     def finish_round(self):
         """
         Placeholder for any end-of-round cleanup or preparation for the next round.
-        Currently, after scoring, the game automatically transitions back to the 'deal' phase.
+        Currently, after scoring, the game automatically transitions back to the DEAL phase.
         """
-        self.current_phase = 'deal'
+        self.current_phase = Phase.DEAL
 
     def step(self, actions):
         """
@@ -484,22 +733,37 @@ class MusGame:
         Each action is expected to be a dictionary with keys:
             'action_type': integer representing the action.
                 (0: discard, 1: bet, 2: raise, 3: call, 4: pass, 5: signal)
-            'cards': list (binary mask) for discarding (if action_type==0).
+            'cards': list (binary mask) for discarding (if action_type==0), or the
+                same mask packed into an integer (bit i set discards card i).
             'amount': integer value for bet/raise actions.
             'signal': integer representing the covert signal.
         Phase transitions:
-          - In the 'mus' phase, process discards and signals.
+          - In the MUS phase, process discards and signals.
           - Then automatically transition to the play phase (which auto-handles betting rounds).
-          - In the 'scoring' phase, scoring is auto-handled.
+          - In the SCORING phase, scoring is auto-handled.
+        Information about intercepted signals is returned and also kept in
+        self.last_intercepted until the next step.
+        """
+        return self.step_arrays(*actions_to_arrays(actions, self.num_players))
+
+    def step_arrays(self, action_types, amounts, cards, signals):
+        """
+        Array form of step(), with one entry per player ID:
+            action_types: action codes as in step(), or -1 for no action.
+            amounts: bet/raise amounts (unused while betting is simulated).
+            cards: (num_players, 4) discard mask.
+            signals: covert signal values.
         """
-        if self.current_phase == 'mus':
+        self.last_intercepted = {}
+        if self.current_phase == Phase.MUS:
             # Track which players have intercepted signals
             intercepted_info = {}
             
-            for player, action in actions.items():
+            for player in range(self.num_players):
+                action_type = action_types[player]
                 # Process signaling action if provided.
-                if action.get('action_type') == 5 and 'signal' in action:
-                    signal_value = action['signal']
+                if action_type == 5:
+                    signal_value = int(signals[player])
                     interceptors = self.update_covert_signal(player, signal_value)
                     if interceptors:
                         intercepted_info[player] = {
@@ -508,10 +772,10 @@ class MusGame:
                         }
                 
                 # Process discard actions if the action type indicates discard.
-                if action.get('action_type') == 0 and 'cards' in action:
-                    # Convert the binary mask (e.g., [0, 1, 0, 1]) to indices.
-                    cards_to_discard = [i for i, v in enumerate(action.get('cards', [])) if v == 1]
-                    self.perform_discard(player, cards_to_discard)
+                elif action_type == 0 and cards[player].any():
+                    self.perform_discard(player, np.flatnonzero(cards[player]))
+            
+            self.last_intercepted = intercepted_info
             
             # After processing discards/signals in the mus phase, move to play.
             self.start_play_phase()
@@ -519,13 +783,13 @@ class MusGame:
             # Return information about intercepted signals
             return intercepted_info
             
-        elif self.current_phase == 'play':
-            # For this iteration, betting rounds are auto-handled.
+        elif self.current_phase == Phase.PLAY:
+            # Betting rounds are auto-handled by start_play_phase, which already moves
+            # on to scoring, so there is nothing to re-run here.
             # Future versions may use agent actions for betting in the play phase.
-            self.start_play_phase()  # This call will run betting rounds and then scoring.
             return {}
             
-        elif self.current_phase == 'scoring':
+        elif self.current_phase == Phase.SCORING:
             # Scoring is auto-handled in score_round().
             # After scoring, finish the round.
             self.finish_round()
@@ -549,6 +813,11 @@ class MusMatch:
         self.match_games = match_games
         self.match_score = {0: 0, 1: 0}
         self.current_game = None
+        # Actions used for every partial game: a discard of no cards (see step()).
+        # They are never mutated, so one read-only mapping is shared instead of
+        # rebuilt per game.
+        self._no_op_actions = MappingProxyType(
+            {p: MappingProxyType({'action_type': 0, 'cards': (0, 0, 0, 0)}) for p in range(num_players)})
 
     def play_partial_game(self):
         """
@@ -556,13 +825,15 @@ class MusMatch:
         For simulation purposes, we assume that all players take a default action (no discards).
         In a full implementation, actions would be provided by agents.
         """
-        self.current_game = MusGame(num_players=self.num_players, target_score=self.target_score)
+        # One MusGame is created per match and reset for each partial game.
+        if self.current_game is None:
+            self.current_game = MusGame(num_players=self.num_players, target_score=self.target_score)
+        else:
+            self.current_game.reset()
         self.current_game.initial_deal()
         # For simulation, assume no discards:
-        actions = {p: {'type': 'discard', 'cards': []} for p in range(self.num_players)}
-        self.current_game.step(actions)
+        self.current_game.step(self._no_op_actions)
         # Determine the winner of this partial game:
-        team0 = {self.current_game.mano, (self.current_game.mano + 2) % self.num_players}
         if self.current_game.scores[0] > self.current_game.scores[1]:
             return 0
         elif self.current_game.scores[1] > self.current_game.scores[0]:
@@ -570,18 +841,66 @@ class MusMatch:
         else:
             return None  # A tie; you may want to handle ties explicitly.
 
-    def play_match(self):
+    def play_match(self, verbose=True):
         """
         Loop over partial games until one team wins the match.
         Returns the winning team and the match score.
+        :param verbose: Print the result of every partial game and of the match.
         """
         while self.match_score[0] < self.match_games and self.match_score[1] < self.match_games:
             winner = self.play_partial_game()
             if winner is not None:
                 self.match_score[winner] += 1
-                print(f"Partial game winner: Team {winner}. Current match score: {self.match_score}")
-            else:
+                if verbose:
+                    print(f"Partial game winner: Team {winner}. Current match score: {self.match_score}")
+            elif verbose:
                 print("Partial game tied; replaying game.")
         overall_winner = 0 if self.match_score[0] >= self.match_games else 1
-        print(f"Match complete. Winning team: Team {overall_winner}")
-        return overall_winner, self.match_score
\ No newline at end of file
+        if verbose:
+            print(f"Match complete. Winning team: Team {overall_winner}")
+        return overall_winner, self.match_score
+
+def _play_match(num_players, target_score, match_games):
+    """Play one quiet match; run in AsyncMatchRunner's worker processes."""
+    return MusMatch(num_players, target_score, match_games).play_match(verbose=False)
+
+class AsyncMatchRunner:
+    """
+    Plays independent matches in parallel worker processes, e.g. for evaluation
+    or tournament runs. Each match is built inside its worker, so only the match
+    settings and the (winner, final_score) results cross process boundaries.
+    Workers are spawned rather than forked, since forking a process that has
+    already run numba's threading layer is not safe; scripts using the runner
+    therefore need an `if __name__ == '__main__':` guard. Use it as a context
+    manager, or call close(), to shut the workers down.
+    """
+    def __init__(self, num_workers=None, num_players=4, target_score=40, match_games=3):
+        """
+        :param num_workers: Number of worker processes (defaults to the CPU count).
+        The other parameters are passed on to every MusMatch.
+        """
+        self.num_players = num_players
+        self.target_score = target_score
+        self.match_games = match_games
+        self._executor = ProcessPoolExecutor(max_workers=num_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self, n_matches):
+        """Start n_matches matches without waiting; returns one future per match."""
+        return [self._executor.submit(_play_match, self.num_players, self.target_score, self.match_games)
+                for _ in range(n_matches)]
+
+    def play(self, n_matches):
+        """Play n_matches matches and return their (winner, final_score) tuples in order."""
+        return [future.result() for future in self.submit(n_matches)]
+
+    def close(self):
+        """Shut down the worker processes."""
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # Pending matches are dropped when leaving because of an error.
+        self._executor.shutdown(cancel_futures=exc_info[0] is not None)
\ No newline at end of file
@@ -0,0 +1,346 @@
+# game_logic_jax.py
+"""
+This module provides a pure-functional JAX version of the Mus game, for use
+with jax.jit, jax.vmap and jax.lax.scan.
+
+The game lives in a MusState NamedTuple (a JAX pytree) and is advanced with
+    state, obs = reset(key, num_players)
+    state, obs, rewards, dones = step(state, actions)
+where actions is the (action_types, amounts, cards, signals) tuple of arrays
+taken by MusGame.step_arrays. Neither function has side effects, so
+jax.vmap(step) steps a whole batch of games at once and jax.lax.scan can roll
+out many steps under one jit. The transitions are those of MusGame.step:
+signals and discards in the mus phase, then the simulated betting rounds and
+the scoring of the four play categories. Observations use the flat layout of
+game_logic.OBS_*.
+
+Randomness comes from the key carried in the state, so results follow the
+same rules as MusGame but not the same random stream. JaxMusEnv wraps the
+functions in a gym.Env that returns NumPy arrays like MusEnv does.
+
+This module needs jax, which the rest of the package does not.
+"""
+
+from functools import partial
+from typing import NamedTuple
+
+import numpy as np
+import gymnasium as gym
+import jax
+import jax.numpy as jnp
+from jax import lax
+from cards import NUM_CARDS, ORDER_ARR, ORDER_BY_ID, VALUE_BY_ID
+from game_logic import (Phase, NO_BET, actions_to_arrays, observation_size, observation_views,
+                        OBS_HAND, OBS_PHASE, OBS_PARTNER_SIGNAL, OBS_SCORES, OBS_CURRENT_BET,
+                        OBS_CURRENT_CATEGORY, OBS_INTERCEPTED)
+from hand_evaluation_numba import JUEGO_RANK_BY_TOTAL
+from mus_env import make_observation_space
+
+# Lookup tables as device arrays, so they can be indexed with traced values.
+_ORDER_BY_ID = jnp.asarray(ORDER_BY_ID, dtype=jnp.int32)
+_VALUE_BY_ID = jnp.asarray(VALUE_BY_ID, dtype=jnp.int32)
+_ORDER_BY_RANK = jnp.asarray(ORDER_ARR, dtype=jnp.int32)
+_JUEGO_RANK_BY_TOTAL = jnp.asarray(JUEGO_RANK_BY_TOTAL, dtype=jnp.int32)
+_NUM_RANKS = len(ORDER_ARR)
+
+# Weights that pack four sorted card orders (each < 16) into one integer.
+_PACK_WEIGHTS = jnp.array([16 ** 3, 16 ** 2, 16, 1], dtype=jnp.int32)
+
+# Action codes, as in MusGame.step.
+_DISCARD = 0
+_SIGNAL = 5
+
+# Simulated betting actions, in the order of game_logic.BETTING_ACTIONS.
+_BET, _RAISE, _CALL, _PASS = range(4)
+
+class MusState(NamedTuple):
+    """State of one Mus game, as used by reset() and step()."""
+    hands: jax.Array  # (num_players, 4) int8 card ids.
+    scores: jax.Array  # (2,) int32 team scores.
+    covert_signals: jax.Array  # (num_players,) int8.
+    intercepted: jax.Array  # (num_players, num_players) bool; [p, q] is set when p intercepted q.
+    team_of: jax.Array  # (num_players,) int8.
+    turn_order: jax.Array  # (num_players,) int32 player IDs, starting with mano.
+    deck: jax.Array  # (NUM_CARDS,) int8 buffer laid out as in cards.Deck.
+    deck_cursor: jax.Array  # Next card to deal.
+    deck_end: jax.Array  # End of the undealt cards.
+    num_discarded: jax.Array  # Size of the discard pile at the front of the deck.
+    phase: jax.Array  # int32 Phase value.
+    current_turn: jax.Array
+    current_bet: jax.Array
+    rng_key: jax.Array
+
+def reset(key, num_players=4):
+    """
+    Deal a new game from a shuffled deck, as MusGame.reset() and initial_deal() do.
+    Returns (state, observations). num_players must be static under jit.
+    """
+    key, deck_key = jax.random.split(key)
+    deck = jax.random.permutation(deck_key, NUM_CARDS).astype(jnp.int8)
+    hands = deck[:4 * num_players].reshape(num_players, 4)
+    # The mano has the best first card; ties go to the lowest player id.
+    mano = jnp.argmax(_ORDER_BY_ID[hands[:, 0]])
+    players = jnp.arange(num_players)
+    # Team 0 is the mano and the player seated opposite.
+    team_of = jnp.where((players == mano) | (players == (mano + 2) % num_players), 0, 1)
+    state = MusState(
+        hands=hands,
+        scores=jnp.zeros(2, dtype=jnp.int32),
+        covert_signals=jnp.zeros(num_players, dtype=jnp.int8),
+        intercepted=jnp.zeros((num_players, num_players), dtype=bool),
+        team_of=team_of.astype(jnp.int8),
+        turn_order=((mano + players) % num_players).astype(jnp.int32),
+        deck=deck,
+        deck_cursor=jnp.int32(4 * num_players),
+        deck_end=jnp.int32(NUM_CARDS),
+        num_discarded=jnp.int32(0),
+        phase=jnp.int32(Phase.MUS),
+        current_turn=jnp.int32(0),
+        current_bet=jnp.int32(0),
+        rng_key=key,
+    )
+    return state, observation(state)
+
+def observation(state):
+    """Every player's flat observation (see game_logic.OBS_*), as a (num_players, size) int16 array."""
+    num_players = state.hands.shape[0]
+    players = jnp.arange(num_players)
+    # The partner is the lowest other player on the same team (or the player itself).
+    same_team = (state.team_of[:, None] == state.team_of[None, :]) & (players[:, None] != players[None, :])
+    partner = jnp.where(same_team.any(axis=1), jnp.argmax(same_team, axis=1), players)
+    in_play = state.phase == Phase.PLAY
+    obs = jnp.zeros((num_players, observation_size(num_players)), dtype=jnp.int32)
+    obs = obs.at[:, OBS_HAND].set(_ORDER_BY_ID[state.hands])
+    obs = obs.at[:, OBS_PHASE].set(state.phase)
+    obs = obs.at[:, OBS_PARTNER_SIGNAL].set(state.covert_signals[partner])
+    obs = obs.at[:, OBS_SCORES].set(state.scores)
+    obs = obs.at[:, OBS_CURRENT_BET].set(jnp.where(in_play, state.current_bet, 0))
+    obs = obs.at[:, OBS_CURRENT_CATEGORY].set(-1)
+    intercepted = jnp.where(state.intercepted, state.covert_signals[None, :], 0)
+    return obs.at[:, OBS_INTERCEPTED:].set(intercepted).astype(jnp.int16)
+
+def step(state, actions, target_score=40, signal_intercept_chance=0.2):
+    """
+    Pure counterpart of MusEnv.step. actions is the tuple
+    (action_types, amounts, cards, signals) of per-player arrays (see
+    game_logic.actions_to_arrays). Returns (state, observations, rewards, dones).
+    """
+    state = lax.switch(state.phase, (_no_op_step, _mus_step, _no_op_step, _scoring_step),
+                       state, actions, signal_intercept_chance)
+    num_players = state.hands.shape[0]
+    # MusGame.get_reward is 0 throughout.
+    rewards = jnp.zeros(num_players, dtype=jnp.float32)
+    dones = jnp.broadcast_to((state.scores >= target_score).any(), (num_players,))
+    return state, observation(state), rewards, dones
+
+def sample_actions(key, num_players=4):
+    """
+    Uniformly random actions for every player, drawn from the same ranges as
+    MusEnv.action_space, as an (action_types, amounts, cards, signals) tuple.
+    """
+    type_key, amount_key, cards_key, signal_key = jax.random.split(key, 4)
+    return (jax.random.randint(type_key, (num_players,), 0, 6, dtype=jnp.int8),
+            jax.random.randint(amount_key, (num_players,), 0, 11, dtype=jnp.int8),
+            jax.random.randint(cards_key, (num_players, 4), 0, 2, dtype=jnp.uint8),
+            jax.random.randint(signal_key, (num_players,), 0, 4, dtype=jnp.int8))
+
+@partial(jax.jit, static_argnames=('k',))
+def rollout(state, key, k, target_score=40, signal_intercept_chance=0.2):
+    """
+    Play k steps with random actions (see sample_actions) inside one compiled
+    lax.scan. Returns the final state and the per-step observations, rewards
+    and dones stacked along a leading axis of length k. Use jax.vmap for a batch
+    of games.
+    """
+    num_players = state.hands.shape[0]
+
+    def body(state, step_key):
+        state, obs, rewards, dones = step(state, sample_actions(step_key, num_players),
+                                          target_score, signal_intercept_chance)
+        return state, (obs, rewards, dones)
+
+    return lax.scan(body, state, jax.random.split(key, k))
+
+def _no_op_step(state, actions, signal_intercept_chance):
+    """Deal and play phases: MusGame.step leaves the state unchanged."""
+    return state
+
+def _scoring_step(state, actions, signal_intercept_chance):
+    """Scoring phase: finish the round."""
+    return state._replace(phase=jnp.int32(Phase.DEAL))
+
+def _mus_step(state, actions, signal_intercept_chance):
+    """Mus phase: signals and discards, then the play phase and scoring."""
+    action_types, _, cards, signals = actions
+    key, signal_key, discard_key, betting_key = jax.random.split(state.rng_key, 4)
+    state = _send_signals(state, signal_key, action_types == _SIGNAL, signals, signal_intercept_chance)
+    state = _discard_all(state, discard_key, action_types == _DISCARD, cards.astype(bool))
+    # One simulated betting round per category; without a betting winner the best hand wins.
+    winners_and_bets = [_betting_round(state.turn_order, k) for k in jax.random.split(betting_key, 4)]
+    keys = _category_keys(state.hands)
+    scores = state.scores
+    for category, (winner, _) in enumerate(winners_and_bets):
+        winner = jnp.where(winner < 0, jnp.argmax(keys[category]), winner)
+        scores = scores.at[state.team_of[winner]].add(1)
+    return state._replace(scores=scores, phase=jnp.int32(Phase.DEAL),
+                          current_bet=winners_and_bets[-1][1], rng_key=key)
+
+def _send_signals(state, key, sending, signals, signal_intercept_chance):
+    """Record covert signals; each opponent may intercept each nonzero signal."""
+    covert_signals = jnp.where(sending, signals, state.covert_signals).astype(jnp.int8)
+    opponents = state.team_of[:, None] != state.team_of[None, :]
+    caught = jax.random.uniform(key, state.intercepted.shape) < signal_intercept_chance
+    intercepted = state.intercepted | (opponents & caught & (sending & (signals != 0))[None, :])
+    return state._replace(covert_signals=covert_signals, intercepted=intercepted)
+
+def _discard_all(state, key, discarding, masks):
+    """Replace the masked cards of each discarding player's hand, as MusGame.perform_discard does."""
+    num_players = state.hands.shape[0]
+    keys = jax.random.split(key, num_players)
+    positions = jnp.arange(NUM_CARDS)
+    slots = jnp.arange(4)
+
+    def discard(player, carry):
+        hands, deck, cursor, end, discarded = carry
+        mask = masks[player] & discarding[player]
+        n = mask.sum()
+        # Shuffle the discard pile back in with the undealt cards if too few are left.
+        left = end - cursor
+        in_pile = (positions < discarded) | ((positions >= cursor) & (positions < end))
+        noise = jnp.where(in_pile, jax.random.uniform(keys[player], (NUM_CARDS,)), 2.0)
+        reshuffle = left < n
+        deck = jnp.where(reshuffle, deck[jnp.argsort(noise)], deck)
+        end = jnp.where(reshuffle, discarded + left, end)
+        cursor = jnp.where(reshuffle, 0, cursor)
+        discarded = jnp.where(reshuffle, 0, discarded)
+        # Kept cards first (in hand order), then the newly drawn ones.
+        kept = 4 - n
+        partitioned = hands[player][jnp.argsort(mask, stable=True)]
+        drawn = deck[jnp.clip(cursor + slots - kept, 0, NUM_CARDS - 1)]
+        hands = hands.at[player].set(jnp.where(slots < kept, partitioned, drawn))
+        # The discarded cards go onto the discard pile.
+        pile_slots = jnp.where(slots >= kept, discarded + slots - kept, NUM_CARDS)
+        deck = deck.at[pile_slots].set(partitioned, mode='drop')
+        return hands, deck, cursor + n, end, discarded + n
+
+    hands, deck, cursor, end, discarded = lax.fori_loop(
+        0, num_players, discard,
+        (state.hands, state.deck, state.deck_cursor, state.deck_end, state.num_discarded))
+    return state._replace(hands=hands, deck=deck, deck_cursor=cursor, deck_end=end, num_discarded=discarded)
+
+def _round_complete(bets, active):
+    """Same test as BettingRound.is_round_complete."""
+    has_bet = active & (bets != NO_BET)
+    first = bets[jnp.argmax(has_bet)]
+    all_equal = jnp.where(has_bet, bets == first, True).all()
+    return (active.sum() <= 1) | (has_bet.any() & all_equal)
+
+def _betting_round(turn_order, key):
+    """
+    Simulate one betting round as MusGame.run_detailed_betting_round does.
+    Returns (winner, final_bet); winner is -1 when nobody bet.
+    """
+    num_players = turn_order.shape[0]
+
+    def seat(i, carry):
+        bets, active, current_bet, complete, key = carry
+        player = turn_order[i]
+        key, draw_key = jax.random.split(key)
+        # One draw gives the action (low two bits) and a raise of 1 or 2.
+        draw = jax.random.randint(draw_key, (), 0, 8)
+        action = draw % 4
+        acts = ~complete & active[player]
+        current_bet = current_bet + jnp.where(acts & (action == _RAISE), 1 + draw // 4, 0)
+        bets = bets.at[player].set(jnp.where(acts & (action != _PASS), current_bet, bets[player]))
+        active = active.at[player].set(active[player] & ~(acts & (action == _PASS)))
+        return bets, active, current_bet, complete | _round_complete(bets, active), key
+
+    def one_pass(carry):
+        bets, active, current_bet, _, key = carry
+        return lax.fori_loop(0, num_players, seat, (bets, active, current_bet, jnp.zeros((), dtype=bool), key))
+
+    bets = jnp.full(num_players, NO_BET, dtype=jnp.int32)
+    active = jnp.ones(num_players, dtype=bool)
+    bets, active, current_bet, _, _ = lax.while_loop(
+        lambda carry: ~carry[3], one_pass, (bets, active, jnp.int32(1), _round_complete(bets, active), key))
+    # Ties go to the earliest player in betting order.
+    ordered = bets[turn_order]
+    winner = jnp.where(ordered.max() != NO_BET, turn_order[jnp.argmax(ordered)], -1)
+    return winner, current_bet
+
+def _category_keys(hands):
+    """
+    Keys for grande, chica, pares and juego, one row per category; higher is
+    better in every row (chica keys are negated), as in hand_evaluation.
+    """
+    orders = jnp.sort(_ORDER_BY_ID[hands], axis=1)
+    grande = orders[:, ::-1] @ _PACK_WEIGHTS
+    chica = -(orders @ _PACK_WEIGHTS)
+    # Pares: rank histogram, then quads and triples before pairs.
+    counts = (hands[:, :, None] >> 2 == jnp.arange(_NUM_RANKS)).sum(axis=1)
+    paired = counts == 2
+    group_order = jnp.where(counts >= 3, _ORDER_BY_RANK, 0).max(axis=1)
+    high_pair = jnp.where(paired, _ORDER_BY_RANK, 0).max(axis=1)
+    low_pair = jnp.where(paired, _ORDER_BY_RANK, 16).min(axis=1)
+    num_pairs = paired.sum(axis=1)
+    # Four-of-a-kind counts as two pairs (Duples), as in evaluate_pairs.
+    category = jnp.select([(counts == 4).any(axis=1), (counts == 3).any(axis=1), num_pairs == 2, num_pairs == 1],
+                          [3, 2, 3, 1], 0)
+    high = jnp.where(category == 2, group_order, jnp.where(counts.max(axis=1) == 4, group_order, high_pair))
+    low = jnp.where(num_pairs == 2, low_pair, 0)
+    pares = (category << 8) | (high << 4) | low
+    totals = _VALUE_BY_ID[hands].sum(axis=1)
+    juego = jnp.where(totals >= 31, 64 + _JUEGO_RANK_BY_TOTAL[totals], totals)
+    return jnp.stack([grande, chica, pares, juego])
+
+class JaxMusEnv(gym.Env):
+    """
+    gym.Env over the pure functions: holds the current MusState and returns
+    NumPy results laid out as MusEnv's (flat observations, or a dict of field
+    views with use_dict_obs=True).
+    """
+    def __init__(self, num_players=4, target_score=40, signal_intercept_chance=0.2, seed=None,
+                 use_dict_obs=False):
+        super().__init__()
+        self.num_players = num_players
+        self.use_dict_obs = use_dict_obs
+        self.observation_space = make_observation_space(num_players, use_dict_obs, target_score)
+        self.target_score = target_score
+        self.signal_intercept_chance = signal_intercept_chance
+        if seed is None:
+            seed = int(np.random.default_rng().integers(2 ** 31))
+        self._key = jax.random.PRNGKey(seed)
+        self._reset = jax.jit(reset, static_argnums=1)
+        self._step = jax.jit(lambda state, actions: step(state, actions, target_score, signal_intercept_chance))
+        self.state = None
+
+    def reset(self):
+        """Deal a new game and return the observations."""
+        self._key, key = jax.random.split(self._key)
+        self.state, obs = self._reset(key, self.num_players)
+        return self._observations(obs)
+
+    def step(self, actions):
+        """Step with action dicts keyed by player ID (or a sequence in player order), as MusEnv.step."""
+        return self.step_arrays(*actions_to_arrays(actions, self.num_players))
+
+    def step_arrays(self, action_types, amounts, cards, signals):
+        """Array form of step(); see MusEnv.step_arrays."""
+        self.state, obs, rewards, dones = self._step(self.state, (action_types, amounts, cards, signals))
+        return self._observations(obs), np.asarray(rewards), np.asarray(dones), {}
+
+    def rollout(self, k=32):
+        """
+        Advance the current game by k random steps in one compiled call (see the
+        module-level rollout). Returns the observations, rewards and dones, each
+        with a leading axis of length k.
+        """
+        self._key, key = jax.random.split(self._key)
+        self.state, (obs, rewards, dones) = rollout(self.state, key, k, self.target_score,
+                                                    self.signal_intercept_chance)
+        return self._observations(obs), np.asarray(rewards), np.asarray(dones)
+
+    def _observations(self, obs):
+        """Convert observations to NumPy, unpacked into fields with use_dict_obs."""
+        obs = np.asarray(obs)
+        return observation_views(obs) if self.use_dict_obs else obs
@@ -0,0 +1,252 @@
+# game_logic_numba.py
+"""
+This module provides a numba-compiled version of MusGame.step.
+
+The whole game is held in a MusGameState NamedTuple of NumPy arrays and ints,
+and njit_step applies the same transitions as MusGame.step_arrays in native
+code: signals and discards in the mus phase, then the simulated betting rounds
+and the scoring of the four play categories.
+
+Dealing stays in Python: build a MusGame, reset() and initial_deal() it, and
+take a snapshot with state_from_game(). From then on the state is only changed
+by njit_step, so the MusGame it came from is no longer kept in sync.
+
+Randomness (signal interception, simulated betting, reshuffles) comes from the
+Lehmer generator in shuffle.py, whose state travels in the MusGameState. The
+results therefore follow the same rules as MusGame but not the same random
+stream, and the per-step details MusGame.last_intercepted gives are only
+available as the intercepted_signals bitmasks.
+
+Like MusGame.step, njit_step resolves all four betting rounds and the scoring
+inside the mus-phase step, so a state is never observed in the play phase.
+write_observations therefore always reports no current category (-1) and a
+current bet of 0, which is also what MusGame gives in the phases a step can
+stop in (deal and mus).
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+from numba import njit
+from cards import ORDER_BY_ID
+from game_logic import (Phase, BETTING_ACTIONS, BETTING_BLOCK, NO_BET, round_complete, simulate_betting,
+                        betting_winner, OBS_HAND, OBS_PHASE, OBS_PARTNER_SIGNAL, OBS_SCORES, OBS_CURRENT_BET,
+                        OBS_CURRENT_CATEGORY, OBS_INTERCEPTED)
+from hand_evaluation import CATEGORY_KEYS, RANK_WEIGHTS
+from shuffle import fisher_yates_u8, seed_state, bounded_pair, next_u64
+
+# Plain ints so the compiled kernels can compare against them.
+_PHASE_DEAL = int(Phase.DEAL)
+_PHASE_MUS = int(Phase.MUS)
+_PHASE_PLAY = int(Phase.PLAY)
+_PHASE_SCORING = int(Phase.SCORING)
+
+# Action codes, as in MusGame.step.
+_DISCARD = 0
+_SIGNAL = 5
+
+# Number of simulated betting actions (see game_logic.BETTING_ACTIONS).
+_NUM_BETTING_ACTIONS = len(BETTING_ACTIONS)
+
+# Positions in MusGameState.deck_pos, mirroring the fields of cards.Deck.
+_CURSOR = 0
+_END = 1
+_DISCARDED = 2
+
+# Scale that turns the top 53 bits of a random word into a float in [0, 1).
+_U53 = 1.0 / (1 << 53)
+_SHIFT11 = np.uint64(11)
+
+class MusGameState(NamedTuple):
+    """State of one Mus game, as used by njit_step."""
+    hands: np.ndarray  # (num_players, 4) uint8 card ids.
+    scores: np.ndarray  # (2,) int16 team scores.
+    covert_signals: np.ndarray  # (num_players,) int8.
+    intercepted_signals: np.ndarray  # (num_players,) uint8; bit q of entry p: p intercepted q.
+    team_of: np.ndarray  # (num_players,) int8.
+    turn_order: np.ndarray  # (num_players,) int8 player IDs, starting with mano.
+    deck: np.ndarray  # (NUM_CARDS,) uint8 buffer laid out as in cards.Deck.
+    deck_pos: np.ndarray  # (3,) int64: next card to deal, end of undealt cards, discard pile size.
+    rng_state: np.ndarray  # (2,) uint64 Lehmer generator state.
+    phase: int
+    current_turn: int
+    current_bet: int
+    signal_intercept_chance: float
+
+def state_from_game(game):
+    """
+    Snapshot a dealt MusGame (after initial_deal) into a MusGameState.
+    Every array is copied, so stepping the state leaves the game untouched.
+    """
+    deck = game.deck
+    return MusGameState(
+        hands=game.hands.copy(),
+        scores=game.scores.copy(),
+        covert_signals=game.covert_signals.copy(),
+        intercepted_signals=game.intercepted_signals.copy(),
+        team_of=game.team_of.copy(),
+        turn_order=np.array(game.turn_order, dtype=np.int8),
+        deck=deck.cards.copy(),
+        deck_pos=np.array([deck._cursor, deck._end, deck._num_discarded], dtype=np.int64),
+        rng_state=seed_state(),
+        phase=int(game.current_phase),
+        current_turn=game.current_turn_index,
+        current_bet=0,
+        signal_intercept_chance=float(game.signal_intercept_chance),
+    )
+
+@njit(cache=True)
+def _uniform(rng_state):
+    """Return a float in [0, 1)."""
+    return (next_u64(rng_state) >> _SHIFT11) * _U53
+
+@njit(cache=True)
+def _draw(deck, deck_pos, rng_state, n, out):
+    """Deal n cards into out, first reshuffling the discard pile in if too few are left."""
+    cursor, end, discarded = deck_pos[_CURSOR], deck_pos[_END], deck_pos[_DISCARDED]
+    if end - cursor < n:
+        left = end - cursor
+        deck[discarded:discarded + left] = deck[cursor:end].copy()
+        end = discarded + left
+        fisher_yates_u8(deck[:end], rng_state)
+        cursor = 0
+        deck_pos[_END] = end
+        deck_pos[_DISCARDED] = 0
+    out[:n] = deck[cursor:cursor + n]
+    deck_pos[_CURSOR] = cursor + n
+
+@njit(cache=True)
+def _discard(hands, player, mask, deck, deck_pos, rng_state):
+    """Replace the masked cards of a player's hand, as MusGame.perform_discard does."""
+    hand = hands[player]
+    kept = np.empty(4, dtype=np.uint8)
+    discarded = np.empty(4, dtype=np.uint8)
+    num_kept = 0
+    num_discarded = 0
+    for i in range(4):
+        if mask[i]:
+            discarded[num_discarded] = hand[i]
+            num_discarded += 1
+        else:
+            kept[num_kept] = hand[i]
+            num_kept += 1
+    _draw(deck, deck_pos, rng_state, num_discarded, kept[num_kept:])
+    hand[:] = kept
+    start = deck_pos[_DISCARDED]
+    deck[start:start + num_discarded] = discarded[:num_discarded]
+    deck_pos[_DISCARDED] = start + num_discarded
+
+@njit(cache=True)
+def _signal(state, player, signal):
+    """Record a covert signal and let each opponent try to intercept it."""
+    state.covert_signals[player] = signal
+    if signal == 0:
+        return
+    team = state.team_of[player]
+    bit = np.uint8(1 << player)
+    for opponent in range(state.team_of.shape[0]):
+        if state.team_of[opponent] != team and _uniform(state.rng_state) < state.signal_intercept_chance:
+            state.intercepted_signals[opponent] |= bit
+
+@njit(cache=True)
+def _betting_round(turn_order, rng_state, bets, active):
+    """
+    Simulate one betting round as MusGame.run_detailed_betting_round does, with
+    the same kernels but actions drawn from the Lehmer generator.
+    Returns (winner, final_bet); winner is -1 when nobody bet.
+    """
+    bets[:] = NO_BET
+    active[:] = True
+    current_bet = 1
+    last_raiser = -1
+    num_seats = turn_order.shape[0]
+    action_idx = np.empty((BETTING_BLOCK, num_seats), dtype=np.int64)
+    amounts = np.empty((BETTING_BLOCK, num_seats), dtype=np.int64)
+    complete = round_complete(bets, active)
+    while not complete:
+        for i in range(BETTING_BLOCK):
+            for seat in range(num_seats):
+                action, extra = bounded_pair(rng_state, np.uint64(_NUM_BETTING_ACTIONS), np.uint64(2))
+                action_idx[i, seat] = action
+                amounts[i, seat] = 1 + int(extra)
+        current_bet, last_raiser, complete = simulate_betting(turn_order, bets, active, current_bet,
+                                                              last_raiser, action_idx, amounts)
+    return betting_winner(turn_order, bets), current_bet
+
+@njit(cache=True)
+def _category_winner(hands, category):
+    """
+    Player with the best hand in a play category (a column of
+    hand_evaluation.CATEGORY_KEYS); ties go to the lowest ID.
+    """
+    best = 0
+    best_key = 0
+    for player in range(hands.shape[0]):
+        # Row of the hand's rank tuple, as in hand_evaluation.category_keys.
+        row = 0
+        for i in range(4):
+            row += (hands[player, i] >> 2) * RANK_WEIGHTS[i]
+        key = CATEGORY_KEYS[row, category]
+        if player == 0 or key > best_key:
+            best = player
+            best_key = key
+    return best
+
+@njit(cache=True)
+def njit_step(state, action_types, amounts, cards, signals):
+    """
+    Compiled counterpart of MusGame.step_arrays; takes the same per-player
+    action arrays and returns the next MusGameState. The state's arrays are
+    updated in place; the returned tuple carries the new scalar fields.
+    """
+    phase = state.phase
+    current_bet = state.current_bet
+    if phase == _PHASE_MUS:
+        num_players = state.hands.shape[0]
+        for player in range(num_players):
+            if action_types[player] == _SIGNAL:
+                _signal(state, player, signals[player])
+            elif action_types[player] == _DISCARD and cards[player].any():
+                _discard(state.hands, player, cards[player], state.deck, state.deck_pos, state.rng_state)
+        # Play phase: one simulated betting round per category, then scoring.
+        bets = np.empty(num_players, dtype=np.int16)
+        active = np.empty(num_players, dtype=np.bool_)
+        for category in range(4):
+            winner, current_bet = _betting_round(state.turn_order, state.rng_state, bets, active)
+            if winner < 0:
+                winner = _category_winner(state.hands, category)
+            state.scores[state.team_of[winner]] += 1
+        phase = _PHASE_DEAL
+    elif phase == _PHASE_SCORING:
+        phase = _PHASE_DEAL
+    return MusGameState(state.hands, state.scores, state.covert_signals, state.intercepted_signals,
+                        state.team_of, state.turn_order, state.deck, state.deck_pos, state.rng_state,
+                        phase, state.current_turn, current_bet, state.signal_intercept_chance)
+
+@njit(cache=True)
+def write_observations(state, obs):
+    """
+    Write every player's flat observation (see game_logic.OBS_*) into the
+    (num_players, observation_size) array obs. The betting fields are only
+    filled for a state in the play phase, which njit_step never stops in (see
+    the module docstring); OBS_CURRENT_CATEGORY is always -1.
+    """
+    num_players = state.hands.shape[0]
+    in_play = state.phase == _PHASE_PLAY
+    for player in range(num_players):
+        row = obs[player]
+        row[OBS_HAND] = ORDER_BY_ID[state.hands[player]]
+        row[OBS_PHASE] = state.phase
+        # The partner is the other player on the same team (or the player itself).
+        partner = player
+        for q in range(num_players):
+            if q != player and state.team_of[q] == state.team_of[player]:
+                partner = q
+                break
+        row[OBS_PARTNER_SIGNAL] = state.covert_signals[partner]
+        row[OBS_SCORES] = state.scores
+        row[OBS_CURRENT_BET] = state.current_bet if in_play else 0
+        row[OBS_CURRENT_CATEGORY] = -1
+        mask = state.intercepted_signals[player]
+        for q in range(num_players):
+            row[OBS_INTERCEPTED + q] = state.covert_signals[q] if (mask >> q) & 1 else 0
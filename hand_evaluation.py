@@ -5,16 +5,36 @@ This module provides hand evaluation functions for the Mus game for each play ca
 - Chica: Best low cards.
 - Pares: Pairs evaluation (single pair, three-of-a-kind, or two pairs).
 - Juego: Sum of card values evaluation.
+
+Hands are sequences of card ids (see cards.py); the work is done by the compiled
+kernels in hand_evaluation_numba.py. The evaluate_* functions are not memoised:
+building a hashable key for a hand costs more than running the kernel.
+
+The *_keys functions evaluate every player's hand at once. They take
+(num_players, 4) arrays and return one integer key per player that orders
+hands the same way as the corresponding evaluate_* tuples.
+
+Every category depends only on the ranks of the four cards, so category_keys
+looks all four keys up in CATEGORY_KEYS, a table built at import time with
+one row per ordered 4-tuple of ranks.
 """
 
+import numpy as np
+from cards import NUM_CARDS, RANKS, ORDER_BY_ID, VALUE_BY_ID
+from hand_evaluation_numba import (evaluate_grande_nb, evaluate_chica_nb,
+                                   evaluate_pairs_nb, evaluate_juego_nb,
+                                   pairs_keys_nb, JUEGO_RANK_BY_TOTAL)
+
+# Weights that pack four sorted card orders (each < 16) into one integer.
+_PACK_WEIGHTS = np.array([16 ** 3, 16 ** 2, 16, 1], dtype=np.int64)
+
 def evaluate_grande(hand):
     """
     Evaluate hand for 'Grande' category.
     Returns a tuple of card orders sorted in descending order.
     A higher tuple (lexicographically) indicates a stronger hand.
     """
-    sorted_orders = sorted([card.order for card in hand], reverse=True)
-    return tuple(sorted_orders)
+    return evaluate_grande_nb(np.asarray(hand, dtype=np.uint8))
 
 def evaluate_chica(hand):
     """
@@ -22,43 +42,20 @@ def evaluate_chica(hand):
     Returns a tuple of card orders sorted in ascending order.
     A lower tuple (lexicographically) indicates a stronger hand.
     """
-    sorted_orders = sorted([card.order for card in hand])
-    return tuple(sorted_orders)
+    return evaluate_chica_nb(np.asarray(hand, dtype=np.uint8))
 
 def evaluate_pairs(hand):
     """
     Evaluate hand for 'Pares' category.
-    Returns a tuple where the first element indicates the category:
+    Returns a tuple (category, high, low) where category is:
       0 - No pair
       1 - Single pair
       2 - Three-of-a-kind (Medias)
       3 - Two pairs (Duples)
-    Followed by one or more tie-breaker values (the ORDER values of the relevant rank(s)).
+    followed by the tie-breaker values (the ORDER values of the relevant rank(s),
+    highest first). Unused tie-breaker slots are 0.
     """
-    from collections import Counter
-    counts = Counter(card.rank for card in hand)
-    pairs = [rank for rank, count in counts.items() if count == 2]
-    triples = [rank for rank, count in counts.items() if count == 3]
-    quads = [rank for rank, count in counts.items() if count == 4]
-    
-    # Import the ranking order dictionary from cards.py
-    try:
-        from cards import ORDER
-    except ImportError:
-        ORDER = {}
-
-    if quads:
-        # Four-of-a-kind: for simplicity, treat as two pairs (Duples).
-        return (3, ORDER.get(quads[0], 0))
-    elif triples:
-        return (2, ORDER.get(triples[0], 0))
-    elif len(pairs) == 2:
-        sorted_pairs = sorted([ORDER.get(rank, 0) for rank in pairs], reverse=True)
-        return (3,) + tuple(sorted_pairs)
-    elif len(pairs) == 1:
-        return (1, ORDER.get(pairs[0], 0))
-    else:
-        return (0,)
+    return evaluate_pairs_nb(np.asarray(hand, dtype=np.uint8))
 
 def evaluate_juego(hand):
     """
@@ -69,19 +66,57 @@ def evaluate_juego(hand):
     If the total is less than 31, the hand is ranked solely by its point sum.
     Returns a tuple (is_juego, rank) where is_juego is 1 if the hand qualifies as juego, 0 otherwise.
     """
-    total = sum(card.value for card in hand)
-    juego_ranking = {
-        31: 8,
-        32: 7,
-        40: 6,
-        37: 5,
-        36: 4,
-        35: 3,
-        34: 2,
-        33: 1
-    }
-    if total >= 31:
-        rank = juego_ranking.get(total, 0)
-        return (1, rank)
-    else:
-        return (0, total)
+    return evaluate_juego_nb(np.asarray(hand, dtype=np.uint8))
+
+def grande_keys(hand_orders):
+    """Grande keys for a (num_players, 4) array of card orders; higher is better."""
+    return np.sort(hand_orders, axis=1)[:, ::-1] @ _PACK_WEIGHTS
+
+def chica_keys(hand_orders):
+    """Chica keys for a (num_players, 4) array of card orders; lower is better."""
+    return np.sort(hand_orders, axis=1) @ _PACK_WEIGHTS
+
+def pairs_keys(hands):
+    """Pares keys for a (num_players, 4) uint8 array of card ids; higher is better."""
+    return pairs_keys_nb(hands)
+
+def juego_keys(hand_values):
+    """Juego keys for a (num_players, 4) array of card values; higher is better."""
+    totals = hand_values.sum(axis=1)
+    is_juego = totals >= 31
+    # Every juego outranks every non-juego point total (which is below 64).
+    return np.where(is_juego, 64 + JUEGO_RANK_BY_TOTAL[totals], totals)
+
+# Columns of CATEGORY_KEYS, in the order of MusGame.play_categories.
+GRANDE, CHICA, PARES, JUEGO = range(4)
+
+# Place value of each card's rank in a rank-tuple index (base len(RANKS), first card highest).
+RANK_WEIGHTS = np.array([len(RANKS) ** 3, len(RANKS) ** 2, len(RANKS), 1], dtype=np.int64)
+
+# Rank (index into RANKS) of every card id.
+_RANK_BY_ID = np.arange(NUM_CARDS, dtype=np.int64) >> 2
+
+def _build_category_keys():
+    """Keys of all four categories for every ordered 4-tuple of ranks; higher is better."""
+    ranks = np.indices((len(RANKS),) * 4).reshape(4, -1).T
+    # Any suit will do: take the first card of each rank.
+    hands = (ranks * 4).astype(np.uint8)
+    orders = ORDER_BY_ID[hands]
+    keys = np.empty((len(hands), 4), dtype=np.int32)
+    keys[:, GRANDE] = grande_keys(orders)
+    # Chica keys are negated so that every column is higher-is-better.
+    keys[:, CHICA] = -chica_keys(orders)
+    keys[:, PARES] = pairs_keys(hands)
+    keys[:, JUEGO] = juego_keys(VALUE_BY_ID[hands])
+    return keys
+
+# (len(RANKS) ** 4, 4) table, indexed by the rank tuple of a hand in dealt order.
+CATEGORY_KEYS = _build_category_keys()
+
+def category_keys(hands):
+    """
+    Keys of every category for a (num_players, 4) uint8 array of card ids, as a
+    (num_players, 4) array with columns GRANDE, CHICA, PARES and JUEGO.
+    Higher is better in every column, so chica keys are the negated chica_keys.
+    """
+    return CATEGORY_KEYS[_RANK_BY_ID[hands] @ RANK_WEIGHTS]
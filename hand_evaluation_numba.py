@@ -0,0 +1,101 @@
+# hand_evaluation_numba.py
+"""
+This module provides numba-compiled kernels behind the hand evaluation functions
+in hand_evaluation.py. Each kernel takes a 4-card hand as a uint8 array of card
+ids and returns a fixed-width tuple of ints.
+
+The kernels are declared with explicit signatures, so they are compiled (or
+loaded from the on-disk cache) at import time rather than during the first game.
+"""
+
+import numpy as np
+from numba import njit
+from cards import RANKS, ORDER_ARR, ORDER_BY_ID, VALUE_BY_ID
+
+NUM_RANKS = len(RANKS)
+
+# Juego rank of each point total: 31 is best, then 32, 40, 37, 36, 35, 34, 33.
+JUEGO_RANK_BY_TOTAL = np.zeros(41, dtype=np.int64)
+for _total, _rank in ((31, 8), (32, 7), (40, 6), (37, 5), (36, 4), (35, 3), (34, 2), (33, 1)):
+    JUEGO_RANK_BY_TOTAL[_total] = _rank
+
+@njit('UniTuple(i8, 4)(u1[:])', cache=True)
+def evaluate_grande_nb(hand):
+    """Card orders sorted in descending order."""
+    orders = np.empty(4, dtype=np.int64)
+    for i in range(4):
+        orders[i] = ORDER_BY_ID[hand[i]]
+    orders.sort()
+    return (orders[3], orders[2], orders[1], orders[0])
+
+@njit('UniTuple(i8, 4)(u1[:])', cache=True)
+def evaluate_chica_nb(hand):
+    """Card orders sorted in ascending order."""
+    orders = np.empty(4, dtype=np.int64)
+    for i in range(4):
+        orders[i] = ORDER_BY_ID[hand[i]]
+    orders.sort()
+    return (orders[0], orders[1], orders[2], orders[3])
+
+# Rank histograms pack one 4-bit count per rank into a uint64 (10 ranks -> 40 bits).
+# _NIBBLE_LOW has the low bit of every rank nibble set, and _ORDER_NIBBLES holds
+# the ORDER value of every rank in that rank's nibble.
+_NIBBLE_LOW = np.uint64(sum(1 << (4 * rank) for rank in range(NUM_RANKS)))
+_ORDER_NIBBLES = np.uint64(sum(int(order) << (4 * rank) for rank, order in enumerate(ORDER_ARR)))
+_NIBBLE = np.uint64(0xF)
+_ONE = np.uint64(1)
+_TWO = np.uint64(2)
+_FOUR = np.uint64(4)
+_TOP_NIBBLE_SHIFT = np.uint64(4 * (NUM_RANKS - 1))
+
+@njit(cache=True)
+def _order_of_nibble(mask):
+    """ORDER value of the single rank whose nibble low bit is set in mask."""
+    selected = (mask * _NIBBLE) & _ORDER_NIBBLES
+    # Multiplying by _NIBBLE_LOW sums every nibble into the top one.
+    return np.int64(((selected * _NIBBLE_LOW) >> _TOP_NIBBLE_SHIFT) & _NIBBLE)
+
+@njit('UniTuple(i8, 3)(u1[:])', cache=True)
+def evaluate_pairs_nb(hand):
+    """(category, high tie-breaker, low tie-breaker); unused slots are 0."""
+    hist = np.uint64(0)
+    for i in range(4):
+        hist += _ONE << (np.uint64(hand[i] >> 2) * _FOUR)
+    # Counts are at most 4, so a nibble equals 4 iff bit 2 is set, 3 iff bits
+    # 0 and 1 are set, and 2 iff bit 1 is set without bit 0.
+    quads = (hist >> _TWO) & _NIBBLE_LOW
+    triples = hist & (hist >> _ONE) & _NIBBLE_LOW
+    pairs = (hist >> _ONE) & ~hist & _NIBBLE_LOW
+    if quads:
+        # Four-of-a-kind: for simplicity, treat as two pairs (Duples).
+        return (3, _order_of_nibble(quads), 0)
+    if triples:
+        return (2, _order_of_nibble(triples), 0)
+    if pairs:
+        first = pairs & (~pairs + _ONE)
+        second = pairs ^ first
+        if not second:
+            return (1, _order_of_nibble(first), 0)
+        a = _order_of_nibble(first)
+        b = _order_of_nibble(second)
+        return (3, max(a, b), min(a, b))
+    return (0, 0, 0)
+
+@njit('UniTuple(i8, 2)(u1[:])', cache=True)
+def evaluate_juego_nb(hand):
+    """(is_juego, rank) where rank is the juego rank or, below 31, the point total."""
+    total = 0
+    for i in range(4):
+        total += VALUE_BY_ID[hand[i]]
+    if total >= 31:
+        return (1, JUEGO_RANK_BY_TOTAL[total])
+    return (0, np.int64(total))
+
+@njit('i8[:](u1[:, :])', cache=True)
+def pairs_keys_nb(hands):
+    """Packed pares keys (category << 8 | high << 4 | low) for each row of hands."""
+    keys = np.empty(hands.shape[0], dtype=np.int64)
+    for p in range(hands.shape[0]):
+        category, high, low = evaluate_pairs_nb(hands[p])
+        keys[p] = (category << 8) | (high << 4) | low
+    return keys
@@ -7,43 +7,147 @@ It provides the Gym interface (reset, step, render) so that it can be used with
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-from game_logic import MusGame
+from numba import njit
+from cards import CARDS, ORDER_ARR, DeckPool
+from game_logic import (MusGame, Phase, PHASE_NAMES, actions_to_arrays, observation_size, observation_views,
+                        OBS_HAND, OBS_PHASE, OBS_PARTNER_SIGNAL, OBS_SCORES, OBS_CURRENT_BET,
+                        OBS_CURRENT_CATEGORY, OBS_INTERCEPTED)
+
+# Plain ints so the compiled kernel can compare against them.
+_PHASE_MUS = int(Phase.MUS)
+_PHASE_PLAY = int(Phase.PLAY)
+
+# Largest bet or raise amount in the action space.
+_MAX_AMOUNT = 10
+
+# Exclusive upper bounds of the action fields drawn at once by MusEnv.fast_sample:
+# action_type, the four discard bits, amount and signal.
+_SAMPLE_BOUNDS = np.array([6, 2, 2, 2, 2, _MAX_AMOUNT + 1, 4])
+
+# Text used by render_human().
+_CARD_NAMES = tuple(str(card) for card in CARDS)
+_RULE = "=" * 50
+
+def make_observation_space(num_players, use_dict_obs=False, target_score=40):
+    """
+    Space of one player's observation: a Box over the flat int16 vector (see
+    game_logic.OBS_*), or with use_dict_obs=True a Dict with one Box per field,
+    matching observation_views(). Scores are bounded through target_score.
+    """
+    size = observation_size(num_players)
+    # Start from the int16 maximum for any field without a bound of its own.
+    low = np.zeros(size, dtype=np.int16)
+    high = np.full(size, np.iinfo(np.int16).max, dtype=np.int16)
+    high[OBS_HAND] = ORDER_ARR.max()
+    high[OBS_PHASE] = max(Phase)
+    high[OBS_PARTNER_SIGNAL] = 3
+    # A game ends once a team reaches target_score; the last round can add at most
+    # target_score (an ordago) or one stone per play category.
+    high[OBS_SCORES] = target_score - 1 + max(target_score, 4)
+    # Simulated raises are not capped, so no bound holds for the bet itself. The
+    # field is only nonzero in the play phase, though, and a step resolves all the
+    # betting before it returns, so the observations step() and reset() return
+    # always hold 0 here. The range below (one largest action per player) is nominal.
+    high[OBS_CURRENT_BET] = _MAX_AMOUNT * num_players
+    low[OBS_CURRENT_CATEGORY] = -1
+    high[OBS_CURRENT_CATEGORY] = 3
+    high[OBS_INTERCEPTED:] = 3
+    if not use_dict_obs:
+        return spaces.Box(low=low, high=high, dtype=np.int16)
+    highs = observation_views(high)
+    return spaces.Dict({field: spaces.Box(low=field_low, high=highs[field], dtype=np.int16)
+                        for field, field_low in observation_views(low).items()})
+
+@njit(cache=True)
+def _process_actions(phase_id, action_types, amounts, cards, signals,
+                     out_types, out_amounts, out_cards, out_signals):
+    """
+    Keep only the actions that are valid in the current phase, writing them into
+    the out_* arrays (an action type of -1 means no action):
+      - mus phase: discards (0) and signals (5).
+      - play phase: bet (1), raise (2), call (3) and pass (4); amounts only for bet/raise.
+    Returns a bitmask of the players whose action was kept (bit p for player p).
+    """
+    acted = 0
+    for player in range(action_types.shape[0]):
+        action_type = action_types[player]
+        out_types[player] = -1
+        out_amounts[player] = 0
+        out_cards[player, :] = 0
+        out_signals[player] = 0
+        if phase_id == _PHASE_MUS:
+            if action_type == 0:  # Discard
+                out_types[player] = 0
+                out_cards[player, :] = cards[player, :]
+            elif action_type == 5:  # Signal
+                out_types[player] = 5
+                out_signals[player] = signals[player]
+        elif phase_id == _PHASE_PLAY:
+            if 1 <= action_type <= 4:  # Betting actions
+                out_types[player] = action_type
+                if action_type <= 2:  # Bet or raise
+                    out_amounts[player] = amounts[player]
+        if out_types[player] >= 0:
+            acted |= 1 << player
+    return acted
 
 class MusEnv(gym.Env):
     """
     Custom multi-agent environment for the Mus card game.
     """
-    metadata = {'render.modes': ['human']}
+    metadata = {'render.modes': ['human', 'ansi']}
 
-    def __init__(self, num_players=4):
+    def __init__(self, num_players=4, signal_intercept_chance=0.2, use_dict_obs=False, deck_pool=None):
+        """
+        :param use_dict_obs: If True, reset/step return the observations as a dict of
+            per-field arrays (see observation_views) instead of one flat array.
+        :param deck_pool: Optional DeckPool to deal from, e.g. one shared by several
+            environments; by default each environment builds its own.
+        """
         super(MusEnv, self).__init__()
         self.num_players = num_players
-        self.game = MusGame(num_players=num_players)
+        self.signal_intercept_chance = signal_intercept_chance
+        # Pre-shuffled decks for every game this environment plays.
+        self.deck_pool = deck_pool if deck_pool is not None else DeckPool()
+        # A single game is reused across resets; reset() loads its first deck.
+        self.game = MusGame(num_players=num_players, signal_intercept_chance=signal_intercept_chance,
+                            shuffle=False)
+        # Step results are written into these arrays in place and returned on every
+        # call (observation fields are views into self._obs), so copy them to keep them.
+        self._obs = np.zeros((num_players, observation_size(num_players)), dtype=np.int16)
+        self._observations = observation_views(self._obs)
+        self._rewards = np.zeros(num_players, dtype=np.float32)
+        self._dones = np.zeros(num_players, dtype=bool)
+        # Game observation versions of the rows currently in self._obs, and the
+        # shared version they were last all checked against.
+        self._obs_stamps = [None] * num_players
+        self._shared_stamp = None
+        # Phase-filtered actions passed on to the game (see _process_actions).
+        self._action_types = np.zeros(num_players, dtype=np.int8)
+        self._amounts = np.zeros(num_players, dtype=np.int8)
+        self._cards = np.zeros((num_players, 4), dtype=np.uint8)
+        self._signals = np.zeros(num_players, dtype=np.int8)
+        # Random source for fast_sample().
+        self._rng = np.random.default_rng()
         
         # Define a richer action space.
         # action_type: 0: discard, 1: bet, 2: raise, 3: call, 4: pass, 5: signal.
-        # cards: a binary vector for each of the 4 cards (only relevant for discard).
+        # cards: a binary vector for each of the 4 cards (only relevant for discard);
+        #        the same mask packed into a 4-bit integer is also accepted by step().
         # amount: integer value for bet/raise (if applicable).
         # signal: discrete value for signaling (e.g., 0-3).
         self.action_space = spaces.Dict({
             'action_type': spaces.Discrete(6),
             'cards': spaces.MultiBinary(4),
-            'amount': spaces.Box(low=0, high=10, shape=(), dtype=np.int32),
+            'amount': spaces.Box(low=0, high=_MAX_AMOUNT, shape=(), dtype=np.int32),
             'signal': spaces.Discrete(4)
         })
         
-        # Define an observation space.
-        # Here, 'hand' is a numerical representation (list of 4 card orders).
-        self.observation_space = spaces.Dict({
-            'hand': spaces.Box(low=0, high=10, shape=(4,), dtype=np.int32),
-            'phase': spaces.Discrete(4),  # 0: deal, 1: mus, 2: play, 3: scoring.
-            'covert_signal': spaces.Discrete(4),
-            'scores': spaces.Box(low=0, high=40, shape=(2,), dtype=np.int32),
-            'betting_info': spaces.Dict({
-                'current_bet': spaces.Box(low=0, high=40, shape=(), dtype=np.int32),
-                'current_category': spaces.Discrete(4)  # 0: grande, 1: chica, 2: pares, 3: juego
-            })
-        })
+        # Observation space of one player. By default the observation is the flat
+        # int16 vector laid out by game_logic.OBS_* (one row per player in what
+        # reset/step return); observation_views() unpacks it into named fields.
+        self.use_dict_obs = use_dict_obs
+        self.observation_space = make_observation_space(num_players, use_dict_obs, self.game.target_score)
 
         self.reset()
 
@@ -51,22 +155,58 @@ class MusEnv(gym.Env):
         """
         Resets the environment for a new game round.
         Returns:
-            A dictionary of observations for each agent.
+            The (num_players, observation_size) observation array, or with
+            use_dict_obs a dictionary of observation arrays, each indexed by player ID first.
         """
-        self.game = MusGame(num_players=self.num_players)
+        # Reuse the game with the next pre-shuffled deck; resetting it changes its
+        # observation versions, so every row of self._obs is rewritten below.
+        self.game.reset_from_deck(self.deck_pool.next_deck())
         self.game.initial_deal()
-        observations = {player: self.game.get_observation(player) for player in range(self.num_players)}
-        return observations
+        self._dones[:] = False
+        self._write_observations()
+        return self._observations if self.use_dict_obs else self._obs
+
+    def _write_observations(self, acted=None):
+        """
+        Copy each player's flat observation from the game into self._obs if it changed.
+        Given acted, the bitmask of players who acted in a step (see _process_actions),
+        only their rows are checked, unless the game's shared observation version
+        has moved on (then every row may have changed).
+        """
+        shared = self.game.shared_observation_version()
+        if acted is None or shared != self._shared_stamp:
+            self._shared_stamp = shared
+            players = range(self.num_players)
+        else:
+            # Only the hands of the players who acted can have changed.
+            players = []
+            while acted:
+                # Lowest set bit first.
+                players.append((acted & -acted).bit_length() - 1)
+                acted &= acted - 1
+        for player in players:
+            stamp = self.game.observation_version(player)
+            if self._obs_stamps[player] != stamp:
+                self._obs[player] = self.game.get_observation_array(player)
+                self._obs_stamps[player] = stamp
+
+    def to_dict_per_player(self):
+        """
+        Regroup the observations as {player: {field: value}}. The values are views
+        into the env's observation buffer, so they follow later steps and resets.
+        """
+        return {player: observation_views(self._obs[player]) for player in range(self.num_players)}
     
     def get_observation(self, player):
         """
         Returns the observation for the given player.
         In addition to their hand and the current phase, this observation
-        includes a 'covert_signal' field.
+        includes a 'covert_signal' field. 'hand' is a view of the player's row of
+        game.hands (card ids), so it changes with the game; copy it to keep it.
         """
         observation = {
             'hand': self.game.hands[player],  # Your hand representation.
-            'phase': self.game.current_phase,
+            'phase': int(self.game.current_phase),
             # 'covert_signal' might be the last signal from the teammate.
             'covert_signal': self.game.get_covert_signal(player)
         }
@@ -77,76 +217,76 @@ class MusEnv(gym.Env):
         """
         Executes a step in the environment given actions from each agent.
         Parameters:
-            actions (dict): Mapping from player IDs to their action dictionaries.
+            actions: Mapping from player IDs to their action dictionaries (see
+                MusGame.step), or a sequence of action dictionaries in player order.
         Returns:
-            observations, rewards, done, info (all dictionaries keyed by player ID).
+            observations: (num_players, observation_size) int16 array, or with
+                use_dict_obs a dict of arrays, each indexed by player ID first.
+            rewards: float32 array of shape (num_players,).
+            dones: bool array of shape (num_players,).
+            info: dict with the signals intercepted during this step.
         """
-        # Process actions based on the current game phase
-        processed_actions = {}
-        
-        for player, action in actions.items():
-            processed_action = {}
-            action_type = action.get('action_type', 0)
-            
-            if self.game.current_phase == 'mus':
-                if action_type == 0:  # Discard
-                    processed_action['action_type'] = 0
-                    processed_action['cards'] = action.get('cards', [0, 0, 0, 0])
-                elif action_type == 5:  # Signal
-                    processed_action['action_type'] = 5
-                    processed_action['signal'] = action.get('signal', 0)
-            
-            elif self.game.current_phase == 'play':
-                if action_type in [1, 2, 3, 4]:  # Betting actions
-                    processed_action['action_type'] = action_type
-                    if action_type in [1, 2]:  # Bet or raise
-                        processed_action['amount'] = action.get('amount', 1)
-            
-            processed_actions[player] = processed_action
-        
-        self.game.step(processed_actions)
+        return self.step_arrays(*actions_to_arrays(actions, self.num_players))
 
-        observations = {}
-        rewards = {}
-        done = {}
-        info = {}
+    def step_arrays(self, action_types, amounts, cards, signals):
+        """
+        Array form of step(), for callers that already hold the actions as arrays
+        indexed by player ID (see game_logic.actions_to_arrays for the layout).
+        Returns the same values as step().
+        """
+        acted = _process_actions(int(self.game.current_phase),
+                         np.asarray(action_types, dtype=np.int8), np.asarray(amounts, dtype=np.int8),
+                         np.asarray(cards, dtype=np.uint8), np.asarray(signals, dtype=np.int8),
+                         self._action_types, self._amounts, self._cards, self._signals)
+        self.game.step_arrays(self._action_types, self._amounts, self._cards, self._signals)
 
-        for player in range(self.num_players):
-            observations[player] = self.game.get_observation(player)
-            rewards[player] = self.game.get_reward(player)
-            done[player] = self.game.is_terminal()
-            info[player] = {}  # Additional info can be provided here.
+        self._write_observations(acted)
+        self.game.get_rewards(self._rewards)
+        self._dones[:] = self.game.is_terminal()
+        info = {'intercepted': self.game.last_intercepted}
+        return self._observations if self.use_dict_obs else self._obs, self._rewards, self._dones, info
 
-        done['__all__'] = all(done[player] for player in range(self.num_players))
-        return observations, rewards, done, info
+    def fast_sample(self):
+        """
+        Draw one random action dict from action_space. All fields come from a
+        single generator call, which is much cheaper than action_space.sample().
+        """
+        draw = self._rng.integers(0, _SAMPLE_BOUNDS)
+        return {'action_type': int(draw[0]), 'cards': draw[1:5].astype(np.int8),
+                'amount': int(draw[5]), 'signal': int(draw[6])}
 
     def render(self, mode='human'):
         """
-        Renders the current game state.
+        Renders the current game state: prints it for mode='human' and returns it
+        as a string for mode='ansi'. Nothing else touches strings, so step() is
+        unaffected by how often this is called.
         """
-        print("\n" + "="*50)
-        print(f"GAME STATE - Phase: {self.game.current_phase}")
-        print(f"Scores - Team 0: {self.game.scores[0]}, Team 1: {self.game.scores[1]}")
-        
+        if mode == 'human':
+            print(self.render_human())
+        elif mode == 'ansi':
+            return self.render_human()
+
+    def render_human(self):
+        """
+        Build the human-readable description of the current game state.
+        """
+        game = self.game
+        parts = ["\n" + _RULE,
+                 "GAME STATE - Phase: %s" % PHASE_NAMES[game.current_phase],
+                 "Scores - Team 0: %d, Team 1: %d" % (game.scores[0], game.scores[1])]
         # Show the current player's turn
-        if hasattr(self.game, 'current_turn_index') and self.game.turn_order:
-            current_player = self.game.current_player()
-            print(f"Current Player: {current_player}")
-        
+        if game.turn_order:
+            parts.append("Current Player: %d" % game.current_player())
         # Show betting information if in play phase
-        if self.game.current_phase == 'play':
-            if hasattr(self.game, 'current_betting_round'):
-                print(f"Current Play Category: {self.game.current_betting_round.play_type}")
-                print(f"Current Bet: {self.game.current_betting_round.current_bet}")
-        
-        # Show each player's hand
+        betting_round = getattr(game, 'current_betting_round', None)
+        if game.current_phase == Phase.PLAY and betting_round is not None:
+            parts.append("Current Play Category: %s" % betting_round.play_type)
+            parts.append("Current Bet: %s" % betting_round.current_bet)
+        # Show each player's hand, and their signal if any
         for player in range(self.num_players):
-            team = "Team 0" if player in [self.game.mano, (self.game.mano + 2) % self.num_players] else "Team 1"
-            hand_str = ", ".join([f"{card.rank} of {card.suit}" for card in self.game.hands[player]])
-            print(f"Player {player} ({team}) Hand: {hand_str}")
-            
-            # Show signals if any
-            if self.game.covert_signals[player] > 0:
-                print(f"  Signal: {self.game.covert_signals[player]}")
-        
-        print("="*50)
+            parts.append("Player %d (Team %d) Hand: %s"
+                         % (player, game.team_of[player], ", ".join([_CARD_NAMES[card] for card in game.hands[player]])))
+            if game.covert_signals[player] > 0:
+                parts.append("  Signal: %d" % game.covert_signals[player])
+        parts.append(_RULE)
+        return "\n".join(parts)
@@ -12,14 +12,47 @@ from mus_env import MusEnv
 class PettingZooMusEnv(ParallelEnv):
     metadata = {"render.modes": ["human"]}
     
-    def __init__(self, num_players=4):
+    def __init__(self, num_players=4, as_tensor=False, use_dict_obs=False):
+        """
+        :param num_players: Number of players (agents).
+        :param as_tensor: If True, observations are returned as rows of a single
+            torch tensor (self.obs_tensor), in pinned memory when CUDA is available,
+            instead of NumPy views. Requires torch.
+        :param use_dict_obs: If True (and as_tensor is False), each agent's observation
+            is a dict of per-field views instead of its flat observation row.
+        """
         super().__init__()
         self.num_players = num_players
-        # Define agent names
-        self.agents = [f"player_{i}" for i in range(num_players)]
+        # Define agent names; agent i is player i of the underlying MusEnv.
+        self._names = tuple(f"player_{i}" for i in range(num_players))
+        self.agents = list(self._names)
         self.possible_agents = self.agents[:]
         # Create an instance of our MusEnv
-        self.env = MusEnv(num_players=num_players)
+        self.env = MusEnv(num_players=num_players, use_dict_obs=use_dict_obs and not as_tensor)
+        # Output dicts, refilled in place by step(). The per-agent observations are
+        # views into MusEnv's observation buffer, so they are built only once.
+        if as_tensor:
+            # Imported here so torch is only needed when tensors are asked for.
+            import torch
+            # The flat observations (see game_logic.OBS_*) of all players as one
+            # contiguous blob, refreshed after every reset and step; move it to the
+            # GPU with self.obs_tensor.to('cuda', non_blocking=True).
+            self.obs_tensor = torch.empty(self.env._obs.shape, dtype=torch.int16,
+                                          pin_memory=torch.cuda.is_available())
+            self._obs_tensor_array = self.obs_tensor.numpy()
+            self._obs_out = {name: self.obs_tensor[i] for i, name in enumerate(self._names)}
+        elif use_dict_obs:
+            self.obs_tensor = None
+            per_player = self.env.to_dict_per_player()
+            self._obs_out = {name: per_player[i] for i, name in enumerate(self._names)}
+        else:
+            self.obs_tensor = None
+            self._obs_out = {name: self.env._obs[i] for i, name in enumerate(self._names)}
+        self._rew_out = {}
+        self._done_out = {}
+        self._info_out = {}
+        # Random source for batch_sample().
+        self._rng = np.random.default_rng()
         # Use the observation and action spaces from our Gym environment.
         self.observation_space = self.env.observation_space
         self.action_space = self.env.action_space
@@ -28,9 +61,10 @@ class PettingZooMusEnv(ParallelEnv):
         """
         Reset the environment and return observations for all agents.
         """
-        obs = self.env.reset()
-        observations = {f"player_{i}": obs[i] for i in range(self.num_players)}
-        return observations
+        self.env.reset()
+        if self.obs_tensor is not None:
+            np.copyto(self._obs_tensor_array, self.env._obs)
+        return self._obs_out
 
     def step(self, actions):
         """
@@ -38,16 +72,57 @@ class PettingZooMusEnv(ParallelEnv):
         convert them into our internal representation (indexed by player id),
         and perform a step in the MusEnv.
         Returns observations, rewards, dones, and infos as dictionaries keyed by agent names.
+        The returned dictionaries are reused (and refilled) by the next step.
+        """
+        # Actions in player order, as MusEnv.step accepts them.
+        return self._fill_outputs(*self.env.step([actions[name] for name in self._names]))
+
+    def step_arrays(self, action_types, amounts, cards, signals):
+        """
+        Array form of step(): the actions are arrays indexed by player ID, as
+        returned by batch_sample() (see MusEnv.step_arrays).
+        Returns the same dictionaries as step().
+        """
+        return self._fill_outputs(*self.env.step_arrays(action_types, amounts, cards, signals))
+
+    def _fill_outputs(self, _, rewards, dones, info):
+        """
+        Refill the per-agent output dicts from a MusEnv step result. The rewards
+        and dones arrays are only re-keyed by agent name here, at the PettingZoo
+        boundary; use self.env's arrays directly to skip this.
+        """
+        if self.obs_tensor is not None:
+            np.copyto(self._obs_tensor_array, self.env._obs)
+        self._rew_out.update(zip(self._names, rewards.tolist()))
+        self._done_out.update(zip(self._names, dones.tolist()))
+        self._done_out["__all__"] = bool(dones.all())
+        for name in self._names:
+            self._info_out[name] = info
+        return self._obs_out, self._rew_out, self._done_out, self._info_out
+
+    def batch_sample(self, n=None):
+        """
+        Draw random actions for n players (num_players by default) with one
+        vectorized call per action field. Returns the arrays
+        (action_types, amounts, cards, signals) in the layout step_arrays() takes.
+        """
+        n = self.num_players if n is None else n
+        rng = self._rng
+        action_types = rng.integers(0, 6, size=n, dtype=np.int8)
+        amounts = rng.integers(0, 11, size=n, dtype=np.int8)
+        cards = rng.integers(0, 2, size=(n, 4), dtype=np.uint8)
+        signals = rng.integers(0, 4, size=n, dtype=np.int8)
+        return action_types, amounts, cards, signals
+
+    def sample(self):
+        """
+        Draw a random action for every agent, as a dict of action dicts keyed by
+        agent name (the batch_sample() arrays, split per agent).
         """
-        # Convert actions: keys are "player_i", map them to indices.
-        action_dict = {i: actions[f"player_{i}"] for i in range(self.num_players)}
-        obs, rewards, dones, infos = self.env.step(action_dict)
-        observations = {f"player_{i}": obs[i] for i in range(self.num_players)}
-        rewards = {f"player_{i}": rewards[i] for i in range(self.num_players)}
-        dones = {f"player_{i}": dones[i] for i in range(self.num_players)}
-        dones["__all__"] = dones["__all__"]
-        infos = {f"player_{i}": infos[i] for i in range(self.num_players)}
-        return observations, rewards, dones, infos
+        action_types, amounts, cards, signals = self.batch_sample()
+        return {name: {'action_type': int(action_types[i]), 'cards': cards[i],
+                       'amount': int(amounts[i]), 'signal': int(signals[i])}
+                for i, name in enumerate(self._names)}
 
     def render(self, mode="human"):
         """
@@ -66,9 +141,8 @@ if __name__ == "__main__":
     done = {"__all__": False}
     step_count = 0
     while not done["__all__"] and step_count < 5:
-        # For testing, sample random actions for each agent.
-        actions = {agent: env.action_space.sample() for agent in env.agents}
-        observations, rewards, done, infos = env.step(actions)
+        # For testing, sample random actions for all agents at once.
+        observations, rewards, done, infos = env.step_arrays(*env.batch_sample())
         print(f"\nStep {step_count+1}:")
         for agent in env.agents:
             print(f"{agent} observation: {observations[agent]}, reward: {rewards[agent]}")
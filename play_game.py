@@ -8,10 +8,36 @@ The other three players use default actions.
 The game state is printed to the console at key points.
 """
 
-from game_logic import MusMatch
+from game_logic import MusMatch, AsyncMatchRunner
+import argparse
 import time
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Play full matches of Mus.")
+    parser.add_argument('--parallel', type=int, default=0, metavar='N',
+                        help="Play --matches matches in N worker processes instead of one match here.")
+    parser.add_argument('--matches', type=int, default=None,
+                        help="Number of matches to play with --parallel (default: N).")
+    return parser.parse_args()
+
+def play_parallel(num_workers, n_matches):
+    """Play n_matches quiet matches across num_workers processes and print the tally."""
+    print(f"Playing {n_matches} matches in {num_workers} worker processes.")
+    with AsyncMatchRunner(num_workers, num_players=4, target_score=40, match_games=3) as runner:
+        start = time.perf_counter()
+        results = runner.play(n_matches)
+        elapsed = time.perf_counter() - start
+    wins = [0, 0]
+    for i, (winner, final_score) in enumerate(results):
+        wins[winner] += 1
+        print(f"Match {i + 1}: Team {winner} wins {final_score}")
+    print(f"\nTeam 0 won {wins[0]} and Team 1 won {wins[1]} of {n_matches} matches in {elapsed:.2f}s.")
+
 def main():
+    args = parse_args()
+    if args.parallel:
+        play_parallel(args.parallel, args.matches or args.parallel)
+        return
     print("Starting a full match of Mus!")
     # Create a match: 4 players, target_score of 40 for a partial game,
     # and a match is won by winning 3 partial games.
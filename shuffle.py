@@ -0,0 +1,138 @@
+# shuffle.py
+"""
+This module provides the compiled shuffle kernels used by the deck.
+
+Random words come from a 128-bit Lehmer generator (held as two uint64 words)
+and bounded indices are drawn with Lemire's multiply-shift method, so each
+Fisher-Yates step costs a few multiplications instead of a modulo.
+
+The generator primitives next_u64, bounded and bounded_pair are public so that
+other compiled code (game_logic_numba) can draw from the same kind of state.
+"""
+
+import os
+
+import numpy as np
+from numba import njit
+
+# Multiplier of the 128-bit Lehmer generator.
+_MULTIPLIER = np.uint64(0xda942042e4dd58b5)
+_MASK32 = np.uint64(0xffffffff)
+_SHIFT32 = np.uint64(32)
+_ZERO = np.uint64(0)
+_ONE = np.uint64(1)
+
+# Seeds the per-deck Lehmer states; one OS-entropy seed at import instead of a
+# system call per deck.
+_SEED_RNG = np.random.default_rng()
+
+def _reseed():
+    """Give a forked child its own seed generator, so it does not deal its parent's decks."""
+    global _SEED_RNG
+    _SEED_RNG = np.random.default_rng()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed)
+
+def seed_state():
+    """
+    Return a fresh generator state drawn from the module's seed generator.
+    The state is a uint64 array [high, low]; the low word is forced odd.
+    """
+    return seed_states(1)[0]
+
+def seed_states(count):
+    """Return a (count, 2) array of independent generator states."""
+    states = _SEED_RNG.bit_generator.random_raw((count, 2))
+    states[:, 1] |= _ONE
+    return states
+
+@njit(cache=True)
+def _mul_hi(a, b):
+    """Return the high 64 bits of the 128-bit product a * b."""
+    a_lo = a & _MASK32
+    a_hi = a >> _SHIFT32
+    b_lo = b & _MASK32
+    b_hi = b >> _SHIFT32
+    lo_lo = a_lo * b_lo
+    hi_lo = a_hi * b_lo
+    lo_hi = a_lo * b_hi
+    hi_hi = a_hi * b_hi
+    cross = (lo_lo >> _SHIFT32) + (hi_lo & _MASK32) + lo_hi
+    return (hi_lo >> _SHIFT32) + (cross >> _SHIFT32) + hi_hi
+
+@njit(cache=True)
+def next_u64(state):
+    """Advance the Lehmer state in place and return the next 64-bit word."""
+    lo = state[1]
+    state[0] = state[0] * _MULTIPLIER + _mul_hi(lo, _MULTIPLIER)
+    state[1] = lo * _MULTIPLIER
+    return state[0]
+
+@njit(cache=True)
+def bounded(state, bound):
+    """Return an unbiased integer in [0, bound) using Lemire's method."""
+    x = next_u64(state)
+    low = x * bound
+    if low < bound:
+        threshold = (_ZERO - bound) % bound
+        while low < threshold:
+            x = next_u64(state)
+            low = x * bound
+    return _mul_hi(x, bound)
+
+@njit(cache=True)
+def bounded_pair(state, bound1, bound2):
+    """
+    Return two unbiased integers in [0, bound1) and [0, bound2) from a single
+    random word (batched ranged generation, Brackett-Rozinsky & Lemire).
+    Requires bound1 * bound2 to fit in 64 bits.
+    """
+    x = next_u64(state)
+    first = _mul_hi(x, bound1)
+    low = x * bound1
+    second = _mul_hi(low, bound2)
+    low = low * bound2
+    product = bound1 * bound2
+    if low < product:
+        threshold = (_ZERO - product) % product
+        while low < threshold:
+            x = next_u64(state)
+            first = _mul_hi(x, bound1)
+            low = x * bound1
+            second = _mul_hi(low, bound2)
+            low = low * bound2
+    return first, second
+
+@njit(cache=True)
+def _swap(cards, i, j):
+    tmp = cards[i]
+    cards[i] = cards[j]
+    cards[j] = tmp
+
+@njit(cache=True)
+def fisher_yates_u8(cards, state):
+    """
+    Shuffle a uint8 array in place.
+    Swaps are processed two at a time so each random word serves two steps.
+    """
+    i = cards.shape[0] - 1
+    while i > 1:
+        j1, j2 = bounded_pair(state, np.uint64(i + 1), np.uint64(i))
+        _swap(cards, i, j1)
+        _swap(cards, i - 1, j2)
+        i -= 2
+    if i == 1:
+        _swap(cards, 1, bounded(state, np.uint64(2)))
+
+@njit(cache=True)
+def shuffle_batch(decks, states):
+    """
+    Shuffle every row of a (N, cards) uint8 array in place.
+    Row r draws from its own generator state states[r].
+    The loop is deliberately serial: a parallel kernel starts numba's threading
+    layer, after which forking the process (SubprocVectorMusEnv,
+    AsyncMatchRunner) can hang, and a pool refill is only microseconds per deck.
+    """
+    for r in range(decks.shape[0]):
+        fisher_yates_u8(decks[r], states[r])
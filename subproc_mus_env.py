@@ -0,0 +1,282 @@
+# subproc_mus_env.py
+"""
+This module runs Mus environments in worker processes, so that game steps are
+not serialised by the GIL.
+
+ExternalProcessMusEnv hosts a single environment in a subprocess and forwards
+attribute reads and method calls to it over a pipe.
+SubprocVectorMusEnv spreads a batch of games over several such workers. The
+workers write observations, rewards and dones into shared memory, so only the
+actions and the small per-game info dicts are pickled on each step.
+
+Workers are started with the 'spawn' method rather than forked: a parent that
+has already run numba's threading layer (or holds other threads) is not safe
+to fork. As with any spawned process, scripts that create these environments
+need an `if __name__ == '__main__':` guard.
+"""
+
+import os
+import traceback
+import weakref
+import multiprocessing as mp
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+from game_logic import observation_size, observation_views
+from mus_env import MusEnv
+from vector_mus_env import VectorMusEnv
+
+# Message types exchanged with a worker process.
+_ACCESS = 'access'
+_CALL = 'call'
+_RESULT = 'result'
+_EXCEPTION = 'exception'
+_CLOSE = 'close'
+
+# Context the worker processes (and their pipes) are created from.
+_CONTEXT = mp.get_context('spawn')
+
+class ExternalProcessMusEnv:
+    """
+    Step an environment in a separate process.
+    Attributes that are not found on this object are read from the remote
+    environment. step() and reset() accept blocking=False, in which case they
+    return a callable that waits for and returns the result; this lets several
+    workers run at the same time.
+    """
+    def __init__(self, constructor=MusEnv):
+        """
+        :param constructor: Picklable callable that builds the environment inside the worker.
+        """
+        self._conn, worker_conn = _CONTEXT.Pipe()
+        self._process = _CONTEXT.Process(target=_worker, args=(constructor, worker_conn), daemon=True)
+        self._process.start()
+        worker_conn.close()
+
+    def __getattr__(self, name):
+        # Private names are never forwarded (they are looked up during pickling and teardown).
+        if name.startswith('_'):
+            raise AttributeError(name)
+        self._conn.send((_ACCESS, name))
+        return self._receive()
+
+    def call(self, name, *args, **kwargs):
+        """
+        Call a method of the remote environment without waiting for it.
+        Returns a callable that waits for and returns the result.
+        """
+        self._conn.send((_CALL, (name, args, kwargs)))
+        return self._receive
+
+    def step(self, actions, blocking=True):
+        """Step the remote environment; see call() for blocking=False."""
+        promise = self.call('step', actions)
+        return promise() if blocking else promise
+
+    def reset(self, *args, blocking=True, **kwargs):
+        """Reset the remote environment; see call() for blocking=False."""
+        promise = self.call('reset', *args, **kwargs)
+        return promise() if blocking else promise
+
+    def close(self):
+        """Stop the worker process."""
+        try:
+            self._conn.send((_CLOSE, None))
+            self._conn.close()
+        except (IOError, OSError):
+            # The worker is already gone.
+            pass
+        self._process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _receive(self):
+        """Wait for the worker's answer, re-raising any error it reported."""
+        message, payload = self._conn.recv()
+        if message == _EXCEPTION:
+            raise RuntimeError(f"Error in environment worker:\n{payload}")
+        return payload
+
+def _worker(constructor, conn):
+    """
+    Build the environment and serve requests from the parent until told to close.
+    An error in one request is reported back for that request only; the worker
+    keeps serving. Only a failure to build the environment ends it.
+    """
+    try:
+        try:
+            env = constructor()
+        except Exception:
+            conn.send((_EXCEPTION, traceback.format_exc()))
+            return
+        while True:
+            try:
+                message, payload = conn.recv()
+            except (EOFError, KeyboardInterrupt):
+                break
+            if message == _CLOSE:
+                break
+            try:
+                if message == _ACCESS:
+                    result = getattr(env, payload)
+                else:
+                    name, args, kwargs = payload
+                    result = getattr(env, name)(*args, **kwargs)
+                conn.send((_RESULT, result))
+            except Exception:
+                conn.send((_EXCEPTION, traceback.format_exc()))
+    finally:
+        conn.close()
+
+def _attach_shared_memory(name):
+    """
+    Attach to a shared memory block created by the parent, leaving its lifetime
+    to the parent: only the creator's registration with the resource tracker
+    counts, and it is dropped when the parent unlinks the block.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block. Workers talk
+        # to the parent's resource tracker, which already holds that name, so the
+        # registration is a no-op; unregistering it here would drop the parent's.
+        return shared_memory.SharedMemory(name=name)
+
+def _shared_arrays(buffer, num_envs, num_players):
+    """
+    Lay out the observation, reward and done arrays of a batch over one buffer.
+    With buffer=None, returns the number of bytes needed instead.
+    """
+    obs_shape = (num_envs, num_players, observation_size(num_players))
+    obs_bytes = int(np.prod(obs_shape)) * np.dtype(np.int16).itemsize
+    # Keep the float32 rewards 4-byte aligned.
+    rewards_offset = -(-obs_bytes // 4) * 4
+    dones_offset = rewards_offset + num_envs * num_players * np.dtype(np.float32).itemsize
+    if buffer is None:
+        return dones_offset + num_envs * num_players
+    obs = np.ndarray(obs_shape, dtype=np.int16, buffer=buffer)
+    rewards = np.ndarray((num_envs, num_players), dtype=np.float32, buffer=buffer, offset=rewards_offset)
+    dones = np.ndarray((num_envs, num_players), dtype=bool, buffer=buffer, offset=dones_offset)
+    return obs, rewards, dones
+
+class _SharedVectorWorker:
+    """
+    Worker-side VectorMusEnv for the games [start, stop) of a batch. Its results
+    are copied into the batch's shared memory instead of being sent back.
+    """
+    def __init__(self, shm_name, start, stop, num_envs, num_players, signal_intercept_chance):
+        # Workers only attach to the block; the parent creates and unlinks it.
+        self._shm = _attach_shared_memory(shm_name)
+        obs, rewards, dones = _shared_arrays(self._shm.buf, num_envs, num_players)
+        self._obs = obs[start:stop]
+        self._rewards = rewards[start:stop]
+        self._dones = dones[start:stop]
+        self.env = VectorMusEnv(stop - start, num_players, signal_intercept_chance)
+        self._publish()
+
+    def _publish(self):
+        np.copyto(self._obs, self.env._obs)
+        np.copyto(self._rewards, self.env._rewards)
+        np.copyto(self._dones, self.env._dones)
+
+    def reset(self, indices=None):
+        self.env.reset(indices)
+        self._publish()
+
+    def step(self, actions_batch):
+        _, _, _, infos = self.env.step(actions_batch)
+        self._publish()
+        return infos
+
+class SubprocVectorMusEnv:
+    """
+    Batched Mus environment whose games are stepped in parallel worker processes.
+    Has the same step/reset interface as VectorMusEnv; the returned arrays live in
+    shared memory and are overwritten on every call.
+    """
+    def __init__(self, num_envs, num_workers=None, num_players=4, signal_intercept_chance=0.2):
+        """
+        :param num_envs: Total number of games.
+        :param num_workers: Number of worker processes (defaults to the CPU count, at most num_envs).
+        """
+        self.num_envs = num_envs
+        self.num_players = num_players
+        num_workers = min(num_workers or os.cpu_count() or 1, num_envs)
+        self._shm = shared_memory.SharedMemory(create=True, size=_shared_arrays(None, num_envs, num_players))
+        self._obs, self._rewards, self._dones = _shared_arrays(self._shm.buf, num_envs, num_players)
+        self._observations = observation_views(self._obs)
+        # Worker w runs the games [self._bounds[w], self._bounds[w + 1]).
+        self._bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self._workers = [
+            ExternalProcessMusEnv(partial(_SharedVectorWorker, self._shm.name, start, stop,
+                                          num_envs, num_players, signal_intercept_chance))
+            for start, stop in zip(self._bounds[:-1], self._bounds[1:])
+        ]
+        # Stop the workers and free the block even if close() is never called.
+        self._finalizer = weakref.finalize(self, _release, self._shm, self._workers)
+        # Each worker resets its games on construction; wait until all are ready.
+        for worker in self._workers:
+            worker.call('_publish')()
+
+    def reset(self, indices=None):
+        """
+        Start new games in the given environments (all of them by default).
+        Returns the dict of stacked observations, as VectorMusEnv.reset does.
+        """
+        promises = []
+        for w, worker in enumerate(self._workers):
+            start, stop = self._bounds[w], self._bounds[w + 1]
+            if indices is None:
+                local = None
+            else:
+                local = [i - start for i in indices if start <= i < stop]
+                if not local:
+                    continue
+            promises.append(worker.reset(local, blocking=False))
+        for promise in promises:
+            promise()
+        return self._observations
+
+    def step(self, actions_batch, blocking=True):
+        """
+        Step every game with its own actions; all workers run at the same time.
+        Returns observations, rewards, dones and infos as VectorMusEnv.step does.
+        With blocking=False, returns a callable that waits for and returns them.
+        """
+        promises = [worker.step(actions_batch[start:stop], blocking=False)
+                    for worker, start, stop in zip(self._workers, self._bounds[:-1], self._bounds[1:])]
+
+        def receive():
+            infos = []
+            for promise in promises:
+                infos.extend(promise())
+            return self._observations, self._rewards, self._dones, infos
+
+        return receive() if blocking else receive
+
+    def close(self):
+        """Stop the workers and release the shared memory. Safe to call more than once."""
+        self._observations = self._obs = self._rewards = self._dones = None
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _release(shm, workers):
+    """Stop a SubprocVectorMusEnv's workers and unlink its shared memory."""
+    for worker in workers:
+        worker.close()
+    try:
+        shm.close()
+    except BufferError:
+        # Arrays returned by the env still view the block; the mapping goes with the process.
+        pass
+    shm.unlink()
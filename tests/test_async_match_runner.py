@@ -0,0 +1,42 @@
+# tests/test_async_match_runner.py
+"""Tests for AsyncMatchRunner and its worker lifecycle."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from game_logic import AsyncMatchRunner
+from mus_env import MusEnv
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class AsyncMatchRunnerTest(unittest.TestCase):
+    def test_play_after_local_env(self):
+        # A local env has already shuffled a deck pool in this process.
+        MusEnv()
+        with AsyncMatchRunner(num_workers=2, match_games=1) as runner:
+            results = runner.play(3)
+        self.assertEqual(len(results), 3)
+        for winner, final_score in results:
+            self.assertIn(winner, (0, 1))
+            self.assertEqual(final_score[winner], 1)
+
+    def test_parent_exits(self):
+        script = ("from game_logic import AsyncMatchRunner, MusMatch\n"
+                  "if __name__ == '__main__':\n"
+                  "    MusMatch(match_games=1).play_match(verbose=False)\n"
+                  "    with AsyncMatchRunner(num_workers=2, match_games=1) as runner:\n"
+                  "        runner.play(2)\n")
+        result = subprocess.run([sys.executable, '-c', script], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_play_game_parallel(self):
+        result = subprocess.run([sys.executable, 'play_game.py', '--parallel', '2', '--matches', '2'],
+                                cwd=REPO_ROOT, capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('of 2 matches', result.stdout)
+
+if __name__ == '__main__':
+    unittest.main()
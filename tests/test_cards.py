@@ -0,0 +1,88 @@
+# tests/test_cards.py
+"""Tests for Deck, DeckPool and the shuffle kernels."""
+
+import unittest
+
+import numpy as np
+from cards import Deck, DeckPool, NUM_CARDS
+from game_logic import MusGame
+from shuffle import fisher_yates_u8, seed_state, seed_states, shuffle_batch
+
+ALL_CARDS = list(range(NUM_CARDS))
+
+def deck_contents(deck):
+    """Undealt cards and the discard pile of a deck, as one sorted list."""
+    undealt = deck.cards[deck._cursor:deck._end]
+    discarded = deck.cards[:deck._num_discarded]
+    return sorted(undealt.tolist() + discarded.tolist())
+
+class ShuffleTest(unittest.TestCase):
+    def test_fisher_yates_permutes(self):
+        state = seed_state()
+        for size in (1, 2, 3, NUM_CARDS):
+            cards = np.arange(size, dtype=np.uint8)
+            fisher_yates_u8(cards, state)
+            self.assertEqual(sorted(cards.tolist()), list(range(size)))
+
+    def test_shuffle_batch_permutes_every_row(self):
+        decks = np.tile(np.arange(NUM_CARDS, dtype=np.uint8), (64, 1))
+        shuffle_batch(decks, seed_states(64))
+        np.testing.assert_array_equal(np.sort(decks, axis=1), np.tile(ALL_CARDS, (64, 1)))
+        # Rows have their own random streams.
+        self.assertGreater(len({row.tobytes() for row in decks}), 60)
+
+class DeckPoolTest(unittest.TestCase):
+    def test_refills_when_exhausted(self):
+        pool = DeckPool(size=4)
+        decks = [pool.next_deck() for _ in range(10)]
+        for deck in decks:
+            self.assertEqual(sorted(deck.tolist()), ALL_CARDS)
+        self.assertEqual(pool.cursor, 2)
+
+class DeckTest(unittest.TestCase):
+    def test_cards_are_conserved(self):
+        deck = Deck()
+        deck.shuffle()
+        rng = np.random.default_rng(0)
+        held = []
+        for _ in range(500):
+            if deck.cards_left() < 4:
+                deck.reshuffle()
+            drawn = deck.deal(int(rng.integers(0, min(4, deck.cards_left()) + 1)))
+            held.extend(drawn.tolist())
+            # Discard some held cards, within the slots dealt since the last reshuffle.
+            free_slots = deck._cursor - deck._num_discarded
+            count = int(rng.integers(0, min(len(held), free_slots) + 1))
+            deck.discard(np.array(held[:count], dtype=np.uint8))
+            held = held[count:]
+            self.assertEqual(sorted(deck_contents(deck) + held), ALL_CARDS)
+
+    def test_load(self):
+        deck = Deck()
+        cards = np.arange(NUM_CARDS, dtype=np.uint8)[::-1].copy()
+        deck.deal(10)
+        deck.discard(deck.cards[:3].copy())
+        deck.load(cards)
+        np.testing.assert_array_equal(deck.deal(4), cards[:4])
+        self.assertEqual(deck.cards_left(), NUM_CARDS - 4)
+
+class GameConservationTest(unittest.TestCase):
+    def test_discards_and_reshuffles_conserve_cards(self):
+        game = MusGame()
+        game.reset()
+        game.initial_deal()
+        rng = np.random.default_rng(1)
+        reshuffles = 0
+        for _ in range(300):
+            player = int(rng.integers(game.num_players))
+            mask = rng.integers(0, 2, size=4).astype(bool)
+            if not mask.any():
+                continue
+            if game.deck.cards_left() < mask.sum():
+                reshuffles += 1
+            game.perform_discard(player, np.flatnonzero(mask))
+            self.assertEqual(sorted(deck_contents(game.deck) + game.hands.ravel().tolist()), ALL_CARDS)
+        self.assertGreater(reshuffles, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# tests/test_game_logic.py
+"""Tests for MusGame and MusMatch."""
+
+import unittest
+
+import numpy as np
+from game_logic import (MusGame, MusMatch, Phase, actions_to_arrays, observation_size, OBS_HAND, OBS_PHASE,
+                        OBS_PARTNER_SIGNAL, OBS_SCORES, OBS_CURRENT_BET, OBS_CURRENT_CATEGORY, OBS_INTERCEPTED)
+from mus_env import MusEnv
+from vector_mus_env import VectorMusEnv
+
+def reference_observation(game, player):
+    """Flat observation rebuilt from scratch out of the dict form of get_observation."""
+    observation = game.get_observation(player)
+    row = np.zeros(observation_size(game.num_players), dtype=np.int16)
+    row[OBS_HAND] = observation['hand']
+    row[OBS_PHASE] = observation['phase']
+    row[OBS_PARTNER_SIGNAL] = observation['partner_signal']
+    row[OBS_SCORES] = observation['scores']
+    row[OBS_CURRENT_BET] = observation['betting_info'].get('current_bet', 0)
+    row[OBS_CURRENT_CATEGORY] = observation['betting_info'].get('current_category', -1)
+    for opponent, signal in observation['intercepted_signals'].items():
+        row[OBS_INTERCEPTED + opponent] = signal
+    return row
+
+def random_actions(rng, num_players):
+    """Random discard or signal actions for a random subset of the players."""
+    actions = {}
+    for player in range(num_players):
+        if rng.random() < 0.5:
+            actions[player] = {'action_type': 0, 'cards': int(rng.integers(16))}
+        elif rng.random() < 0.5:
+            actions[player] = {'action_type': 5, 'signal': int(rng.integers(4))}
+    return actions
+
+class MusMatchTest(unittest.TestCase):
+    def test_no_op_actions_are_empty_discards(self):
+        match = MusMatch()
+        action_types, amounts, cards, signals = actions_to_arrays(match._no_op_actions, match.num_players)
+        self.assertTrue((action_types == 0).all())
+        self.assertFalse(cards.any())
+
+    def test_partial_game_keeps_dealt_hands(self):
+        match = MusMatch()
+        match.play_partial_game()
+        game = match.current_game
+        game.reset()
+        game.initial_deal()
+        dealt = game.hands.copy()
+        game.step(match._no_op_actions)
+        np.testing.assert_array_equal(game.hands, dealt)
+        # One stone for each of the four play categories.
+        self.assertEqual(int(game.scores.sum()), 4)
+
+class ObservationCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.game = MusGame(signal_intercept_chance=0.5)
+        self.game.reset()
+        self.game.initial_deal()
+
+    def test_unchanged_state_reuses_row(self):
+        row = self.game.get_observation_array(0)
+        stamp = self.game.observation_version(0)
+        self.assertIs(self.game.get_observation_array(0), row)
+        self.assertEqual(self.game.observation_version(0), stamp)
+
+    def test_hand_change_only_moves_that_player(self):
+        stamps = [self.game.observation_version(p) for p in range(4)]
+        shared = self.game.shared_observation_version()
+        self.game.perform_discard(1, [0, 2])
+        self.assertEqual(self.game.shared_observation_version(), shared)
+        for player in range(4):
+            changed = self.game.observation_version(player) != stamps[player]
+            self.assertEqual(changed, player == 1)
+        np.testing.assert_array_equal(self.game.get_observation_array(1), reference_observation(self.game, 1))
+
+    def test_signal_moves_shared_version(self):
+        shared = self.game.shared_observation_version()
+        self.game.update_covert_signal(0, 3)
+        self.assertNotEqual(self.game.shared_observation_version(), shared)
+        partner = self.game.partner_of[0]
+        self.assertEqual(self.game.get_observation_array(partner)[OBS_PARTNER_SIGNAL], 3)
+
+    def test_cached_rows_match_fresh_rows(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            for player in range(4):
+                np.testing.assert_array_equal(self.game.get_observation_array(player),
+                                              reference_observation(self.game, player))
+            self.game.step(random_actions(rng, 4))
+            if self.game.current_phase == Phase.DEAL:
+                # Start the next deal from a full deck.
+                self.game.reset()
+                self.game.initial_deal()
+
+class EnvObservationTest(unittest.TestCase):
+    """The envs only copy rows whose stamps moved; the copies must stay current."""
+
+    def test_env_rows_match_game(self):
+        rng = np.random.default_rng(1)
+        env = MusEnv(signal_intercept_chance=0.5)
+        for _ in range(300):
+            # Single-actor, multi-actor and empty steps.
+            obs, _, dones, _ = env.step(random_actions(rng, env.num_players))
+            for player in range(env.num_players):
+                np.testing.assert_array_equal(obs[player], reference_observation(env.game, player))
+            if dones.all() or rng.random() < 0.1:
+                obs = env.reset()
+                for player in range(env.num_players):
+                    np.testing.assert_array_equal(obs[player], reference_observation(env.game, player))
+
+    def test_vector_env_rows_match_games(self):
+        rng = np.random.default_rng(2)
+        env = VectorMusEnv(3, signal_intercept_chance=0.5)
+        for _ in range(100):
+            env.step([random_actions(rng, env.num_players) for _ in range(env.num_envs)])
+            for i, game in enumerate(env.games):
+                for player in range(env.num_players):
+                    np.testing.assert_array_equal(env._obs[i, player], reference_observation(game, player))
+            done = [i for i in range(env.num_envs) if env._dones[i].all()]
+            if done:
+                env.reset(done)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+# tests/test_game_logic_jax.py
+"""Check the pure JAX game functions and JaxMusEnv (skipped without jax)."""
+
+import importlib.util
+import itertools
+import unittest
+
+import numpy as np
+from cards import NUM_CARDS
+from game_logic import Phase, observation_size, OBS_HAND, OBS_PHASE, OBS_SCORES
+from hand_evaluation import CATEGORY_KEYS, RANK_WEIGHTS
+
+HAVE_JAX = importlib.util.find_spec('jax') is not None
+if HAVE_JAX:
+    import jax
+    import jax.numpy as jnp
+    from game_logic_jax import reset, step, sample_actions, rollout, JaxMusEnv, _category_keys
+
+# Every player discards the first and last card.
+_SOME_DISCARDS = [{'action_type': 0, 'cards': (1, 0, 0, 1)}]
+
+def _discard_everything(num_players):
+    """Actions where every player discards the whole hand."""
+    return (jnp.zeros(num_players, dtype=jnp.int8), jnp.zeros(num_players, dtype=jnp.int8),
+            jnp.ones((num_players, 4), dtype=jnp.uint8), jnp.zeros(num_players, dtype=jnp.int8))
+
+def _tracked_cards(state):
+    """Cards in hands, in the discard pile and undealt; each id should appear exactly once."""
+    deck = np.asarray(state.deck)
+    cursor, end, discarded = int(state.deck_cursor), int(state.deck_end), int(state.num_discarded)
+    return np.sort(np.concatenate([np.asarray(state.hands).ravel(), deck[:discarded], deck[cursor:end]]))
+
+@unittest.skipUnless(HAVE_JAX, 'jax is not installed')
+class PureFunctionTest(unittest.TestCase):
+    def test_reset_and_step_under_jit(self):
+        state, obs = jax.jit(reset, static_argnums=1)(jax.random.PRNGKey(0), 4)
+        self.assertEqual(obs.shape, (4, observation_size(4)))
+        self.assertTrue((obs[:, OBS_PHASE] == Phase.MUS).all())
+        self.assertEqual(len(set(np.asarray(state.hands).ravel())), 16)
+        jit_step = jax.jit(step)
+        actions = sample_actions(jax.random.PRNGKey(1), 4)
+        state, obs, rewards, dones = jit_step(state, actions)
+        self.assertEqual(int(state.phase), Phase.DEAL)
+        # One point per play category.
+        self.assertEqual(int(obs[0, OBS_SCORES].sum()), 4)
+        self.assertEqual(rewards.shape, (4,))
+        self.assertFalse(bool(dones.any()))
+        # The step is a pure function of its inputs.
+        _, again, _, _ = jit_step(jax.jit(reset, static_argnums=1)(jax.random.PRNGKey(0), 4)[0], actions)
+        np.testing.assert_array_equal(obs, again)
+
+    def test_reset_and_step_under_vmap(self):
+        batch = 8
+        keys = jax.random.split(jax.random.PRNGKey(2), batch)
+        states, obs = jax.jit(jax.vmap(lambda key: reset(key, 2)))(keys)
+        self.assertEqual(obs.shape, (batch, 2, observation_size(2)))
+        actions = jax.vmap(lambda key: sample_actions(key, 2))(jax.random.split(jax.random.PRNGKey(3), batch))
+        states, obs, rewards, dones = jax.jit(jax.vmap(step))(states, actions)
+        self.assertEqual(obs.shape, (batch, 2, observation_size(2)))
+        self.assertEqual(rewards.shape, (batch, 2))
+        self.assertEqual(dones.shape, (batch, 2))
+        # Each game in the batch matches the same game stepped on its own.
+        single = jax.tree_util.tree_map(lambda x: x[5], states)
+        state, _ = reset(keys[5], 2)
+        state, expected, _, _ = step(state, jax.tree_util.tree_map(lambda x: x[5], actions))
+        np.testing.assert_array_equal(obs[5], expected)
+        np.testing.assert_array_equal(single.hands, state.hands)
+
+    def test_discards_conserve_cards(self):
+        # Returning to the mus phase every step forces repeated full discards and reshuffles.
+        jit_step = jax.jit(step)
+        for num_players in (2, 4):
+            state, _ = reset(jax.random.PRNGKey(num_players), num_players)
+            actions = _discard_everything(num_players)
+            for _ in range(12):
+                state, _, _, _ = jit_step(state._replace(phase=jnp.int32(Phase.MUS)), actions)
+                np.testing.assert_array_equal(_tracked_cards(state), np.arange(NUM_CARDS))
+
+    def test_category_keys_order_like_category_keys_table(self):
+        ranks = np.array(list(itertools.product(range(10), repeat=4)), dtype=np.int64)
+        # Suits do not matter to any category, so every card can be of suit 0.
+        hands = (ranks << 2).astype(np.int8)
+        keys = np.asarray(_category_keys(jnp.asarray(hands)))
+        expected = CATEGORY_KEYS[ranks @ RANK_WEIGHTS]
+        for category in range(4):
+            # Same ordering and ties: the dense ranks of both key sets agree.
+            dense = np.unique(keys[category], return_inverse=True)[1].ravel()
+            expected_dense = np.unique(expected[:, category], return_inverse=True)[1].ravel()
+            np.testing.assert_array_equal(dense, expected_dense)
+
+@unittest.skipUnless(HAVE_JAX, 'jax is not installed')
+class RolloutTest(unittest.TestCase):
+    def test_stacked_shapes(self):
+        steps = 5
+        state, _ = reset(jax.random.PRNGKey(4), 4)
+        _, (obs, rewards, dones) = rollout(state, jax.random.PRNGKey(5), steps)
+        self.assertEqual(obs.shape, (steps, 4, observation_size(4)))
+        self.assertEqual(rewards.shape, (steps, 4))
+        self.assertEqual(dones.shape, (steps, 4))
+
+    def test_matches_sequential_steps(self):
+        steps = 6
+        key = jax.random.PRNGKey(6)
+        state, _ = reset(jax.random.PRNGKey(7), 4)
+        final, (obs, rewards, dones) = rollout(state, key, steps)
+        # rollout draws step t's actions from the t-th split of its key.
+        for t, step_key in enumerate(jax.random.split(key, steps)):
+            state, expected, expected_rewards, expected_dones = step(state, sample_actions(step_key, 4))
+            np.testing.assert_array_equal(obs[t], expected)
+            np.testing.assert_array_equal(rewards[t], expected_rewards)
+            np.testing.assert_array_equal(dones[t], expected_dones)
+        for field, value in final._asdict().items():
+            np.testing.assert_array_equal(value, getattr(state, field), err_msg=field)
+
+    def test_env_rollout(self):
+        for use_dict_obs in (False, True):
+            env = JaxMusEnv(num_players=2, seed=8, use_dict_obs=use_dict_obs)
+            env.reset()
+            obs, rewards, dones = env.rollout(k=4)
+            scores = obs['scores'] if use_dict_obs else obs[..., OBS_SCORES]
+            self.assertEqual(scores.shape, (4, 2, 2))
+            self.assertEqual(rewards.shape, (4, 2))
+            self.assertEqual(dones.shape, (4, 2))
+
+def _contains(env, obs):
+    """observation_space describes one player's observation, as in MusEnv."""
+    if isinstance(obs, dict):
+        return all(env.observation_space.contains({field: value[p] for field, value in obs.items()})
+                   for p in range(env.num_players))
+    return all(env.observation_space.contains(row) for row in obs)
+
+@unittest.skipUnless(HAVE_JAX, 'jax is not installed')
+class JaxMusEnvTest(unittest.TestCase):
+    def _play(self, env):
+        obs = env.reset()
+        self.assertTrue(_contains(env, obs))
+        obs, rewards, dones, _ = env.step(_SOME_DISCARDS * env.num_players)
+        self.assertTrue(_contains(env, obs))
+        self.assertEqual(rewards.shape, (env.num_players,))
+        self.assertEqual(dones.shape, (env.num_players,))
+        return obs
+
+    def test_flat_observations(self):
+        env = JaxMusEnv(num_players=4, seed=0)
+        obs = self._play(env)
+        self.assertIsInstance(obs, np.ndarray)
+        self.assertEqual(obs.shape, (4, observation_size(4)))
+
+    def test_dict_observations(self):
+        flat = JaxMusEnv(num_players=4, seed=0)
+        views = JaxMusEnv(num_players=4, seed=0, use_dict_obs=True)
+        obs = views.reset()
+        self.assertIsInstance(obs, dict)
+        self.assertTrue(_contains(views, obs))
+        # Same seed, same game: the dict holds views of the flat observations.
+        np.testing.assert_array_equal(obs['scores'], flat.reset()[:, OBS_SCORES])
+        action = _SOME_DISCARDS * 4
+        obs, _, _, _ = views.step(action)
+        expected, _, _, _ = flat.step(action)
+        self.assertTrue(_contains(views, obs))
+        np.testing.assert_array_equal(obs['hand'], expected[:, OBS_HAND])
+        np.testing.assert_array_equal(obs['phase'], expected[:, OBS_PHASE])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# tests/test_game_logic_numba.py
+"""Compare the compiled game step with MusGame."""
+
+import unittest
+
+import numpy as np
+from game_logic import (MusGame, Phase, actions_to_arrays, observation_size,
+                        OBS_SCORES, OBS_CURRENT_CATEGORY, OBS_CURRENT_BET)
+from game_logic_numba import njit_step, state_from_game, write_observations, _category_winner
+from hand_evaluation import category_keys
+
+def _observations(game):
+    return np.stack([game.get_observation_array(p).copy() for p in range(game.num_players)])
+
+def _compiled_observations(state):
+    obs = np.zeros((state.hands.shape[0], observation_size(state.hands.shape[0])), dtype=np.int16)
+    write_observations(state, obs)
+    return obs
+
+class NjitStepTest(unittest.TestCase):
+    def setUp(self):
+        # Interception always succeeds, so signals do not depend on either random stream.
+        self.game = MusGame(signal_intercept_chance=1.0)
+        self.game.reset()
+        self.game.initial_deal()
+        self.state = state_from_game(self.game)
+
+    def test_dealt_observations_match(self):
+        np.testing.assert_array_equal(_compiled_observations(self.state), _observations(self.game))
+
+    def test_step_observations_match(self):
+        # Discards draw from the same deck buffer on both sides; the betting rounds
+        # use different random streams, so only the scores may differ.
+        actions = {0: {'action_type': 0, 'cards': [1, 0, 1, 0]},
+                   1: {'action_type': 5, 'signal': 2},
+                   2: {'action_type': 0, 'cards': 0b1111},
+                   3: {'action_type': 5, 'signal': 3}}
+        arrays = actions_to_arrays(actions, 4)
+        self.game.step_arrays(*arrays)
+        state = njit_step(self.state, *arrays)
+        self.assertEqual(state.phase, int(self.game.current_phase))
+        self.assertEqual(state.phase, int(Phase.DEAL))
+        np.testing.assert_array_equal(state.hands, self.game.hands)
+        np.testing.assert_array_equal(state.intercepted_signals, self.game.intercepted_signals)
+        compiled = _compiled_observations(state)
+        expected = _observations(self.game)
+        others = np.ones(compiled.shape[1], dtype=bool)
+        others[OBS_SCORES] = False
+        np.testing.assert_array_equal(compiled[:, others], expected[:, others])
+        self.assertTrue((compiled[:, OBS_CURRENT_CATEGORY] == -1).all())
+        self.assertTrue((compiled[:, OBS_CURRENT_BET] == 0).all())
+        # Every category awards one stone either way.
+        self.assertEqual(int(state.scores.sum()), int(self.game.scores.sum()))
+
+class CategoryWinnerTest(unittest.TestCase):
+    def test_matches_category_keys(self):
+        rng = np.random.default_rng(0)
+        for _ in range(500):
+            hands = rng.permutation(40)[:16].astype(np.uint8).reshape(4, 4)
+            winners = np.argmax(category_keys(hands), axis=0)
+            for category in range(4):
+                self.assertEqual(_category_winner(hands, category), winners[category])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# tests/test_hand_evaluation.py
+"""
+Check the compiled hand evaluators and key functions against a plain Python
+version of the original Card-based evaluators.
+"""
+
+import itertools
+import unittest
+from collections import Counter
+
+import numpy as np
+from cards import CARDS, NUM_CARDS, ORDER, ORDER_BY_ID, VALUE_BY_ID
+from hand_evaluation import (evaluate_grande, evaluate_chica, evaluate_pairs, evaluate_juego,
+                             grande_keys, chica_keys, pairs_keys, juego_keys,
+                             category_keys, CATEGORY_KEYS, GRANDE, CHICA, PARES, JUEGO)
+from mus_env import MusEnv
+
+_JUEGO_RANKING = {31: 8, 32: 7, 40: 6, 37: 5, 36: 4, 35: 3, 34: 2, 33: 1}
+
+def reference_grande(cards):
+    return tuple(sorted((card.order for card in cards), reverse=True))
+
+def reference_chica(cards):
+    return tuple(sorted(card.order for card in cards))
+
+def reference_pairs(cards):
+    """Original pares evaluation, padded to (category, high, low)."""
+    counts = Counter(card.rank for card in cards)
+    pairs = [rank for rank, count in counts.items() if count == 2]
+    triples = [rank for rank, count in counts.items() if count == 3]
+    quads = [rank for rank, count in counts.items() if count == 4]
+    if quads:
+        result = (3, ORDER[quads[0]])
+    elif triples:
+        result = (2, ORDER[triples[0]])
+    elif len(pairs) == 2:
+        result = (3,) + tuple(sorted((ORDER[rank] for rank in pairs), reverse=True))
+    elif len(pairs) == 1:
+        result = (1, ORDER[pairs[0]])
+    else:
+        result = (0,)
+    return result + (0,) * (3 - len(result))
+
+def reference_juego(cards):
+    total = sum(card.value for card in cards)
+    if total >= 31:
+        return (1, _JUEGO_RANKING.get(total, 0))
+    return (0, total)
+
+def random_hands(count, seed=0):
+    """count hands of four distinct card ids, as a (count, 4) uint8 array."""
+    rng = np.random.default_rng(seed)
+    return np.argsort(rng.random((count, NUM_CARDS)), axis=1)[:, :4].astype(np.uint8)
+
+class EvaluatorTest(unittest.TestCase):
+    def test_every_rank_multiset(self):
+        # Suits never matter, so one hand per multiset of ranks covers every case;
+        # each rank has four suits, so suits 0..3 keep the cards distinct.
+        for ranks in itertools.combinations_with_replacement(range(NUM_CARDS // 4), 4):
+            suits = Counter()
+            hand = []
+            for rank in ranks:
+                hand.append(rank * 4 + suits[rank])
+                suits[rank] += 1
+            cards = [CARDS[card_id] for card_id in hand]
+            with self.subTest(hand=hand):
+                self.assertEqual(evaluate_grande(hand), reference_grande(cards))
+                self.assertEqual(evaluate_chica(hand), reference_chica(cards))
+                self.assertEqual(evaluate_pairs(hand), reference_pairs(cards))
+                self.assertEqual(evaluate_juego(hand), reference_juego(cards))
+
+class KeysTest(unittest.TestCase):
+    """The *_keys functions must order hands exactly as the evaluate_* tuples do."""
+
+    def _check_order(self, keys, tuples):
+        for i, j in itertools.combinations(range(len(keys)), 2):
+            self.assertEqual(np.sign(keys[i] - keys[j]), (tuples[i] > tuples[j]) - (tuples[i] < tuples[j]))
+
+    def test_keys_order_hands_like_tuples(self):
+        hands = random_hands(300)
+        orders = ORDER_BY_ID[hands]
+        self._check_order(grande_keys(orders), [evaluate_grande(h) for h in hands])
+        self._check_order(chica_keys(orders), [evaluate_chica(h) for h in hands])
+        self._check_order(pairs_keys(hands), [evaluate_pairs(h) for h in hands])
+        self._check_order(juego_keys(VALUE_BY_ID[hands]), [evaluate_juego(h) for h in hands])
+
+class CategoryKeysTest(unittest.TestCase):
+    def test_table_matches_key_functions(self):
+        # Every ordered 4-tuple of ranks, dealt with suit 0 (the table ignores suits).
+        ranks = np.indices((NUM_CARDS // 4,) * 4).reshape(4, -1).T
+        hands = (ranks * 4).astype(np.uint8)
+        self.assertEqual(len(CATEGORY_KEYS), len(hands))
+        keys = category_keys(hands)
+        orders = ORDER_BY_ID[hands]
+        np.testing.assert_array_equal(keys[:, GRANDE], grande_keys(orders))
+        np.testing.assert_array_equal(keys[:, CHICA], -chica_keys(orders))
+        np.testing.assert_array_equal(keys[:, PARES], pairs_keys(hands))
+        np.testing.assert_array_equal(keys[:, JUEGO], juego_keys(VALUE_BY_ID[hands]))
+
+    def test_suits_and_card_order_do_not_matter(self):
+        hands = random_hands(500, seed=1)
+        keys = category_keys(hands)
+        # Same ranks in another order and with other suits.
+        rng = np.random.default_rng(2)
+        shuffled = np.take_along_axis(hands, np.argsort(rng.random(hands.shape), axis=1), axis=1)
+        other_suits = (shuffled & ~np.uint8(3)) | ((shuffled + 1) & 3)
+        np.testing.assert_array_equal(category_keys(other_suits), keys)
+        orders = ORDER_BY_ID[hands]
+        np.testing.assert_array_equal(keys[:, GRANDE], grande_keys(orders))
+        np.testing.assert_array_equal(keys[:, CHICA], -chica_keys(orders))
+        np.testing.assert_array_equal(keys[:, PARES], pairs_keys(hands))
+        np.testing.assert_array_equal(keys[:, JUEGO], juego_keys(VALUE_BY_ID[hands]))
+
+    def test_game_keys_follow_discards(self):
+        env = MusEnv()
+        for _ in range(200):
+            _, _, dones, _ = env.step({p: env.fast_sample() for p in range(env.num_players)})
+            np.testing.assert_array_equal(env.game.hand_keys, category_keys(env.game.hands))
+            if dones.all():
+                env.reset()
+
+if __name__ == '__main__':
+    unittest.main()
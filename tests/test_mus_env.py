@@ -0,0 +1,113 @@
+# tests/test_mus_env.py
+"""Tests for MusEnv."""
+
+import unittest
+
+import numpy as np
+from cards import DeckPool, NUM_CARDS
+from game_logic import Phase, OBS_PHASE, OBS_SCORES, OBS_CURRENT_BET, OBS_CURRENT_CATEGORY
+from mus_env import MusEnv, _process_actions
+from vector_mus_env import VectorMusEnv
+
+class DeckPoolSharingTest(unittest.TestCase):
+    def test_envs_share_a_pool(self):
+        pool = DeckPool(size=8)
+        first = MusEnv(deck_pool=pool)
+        second = MusEnv(deck_pool=pool)
+        self.assertIs(first.deck_pool, pool)
+        self.assertIs(second.deck_pool, pool)
+        # Building an env only takes the deck its first reset deals from.
+        self.assertEqual(pool.cursor, 2)
+        first.reset()
+        self.assertEqual(pool.cursor, 3)
+
+    def test_vector_env_takes_one_deck_per_game(self):
+        pool = DeckPool(size=8)
+        env = VectorMusEnv(3, deck_pool=pool)
+        self.assertEqual(pool.cursor, 3)
+        for game in env.games:
+            self.assertEqual(sorted(game.deck.cards.tolist()), list(range(NUM_CARDS)))
+
+    def test_reset_deals_from_pool(self):
+        pool = DeckPool(size=8)
+        env = MusEnv(deck_pool=pool)
+        expected = pool.pool[pool.cursor].copy()
+        env.reset()
+        np.testing.assert_array_equal(env.game.deck.cards, expected)
+
+class ObservationSpaceTest(unittest.TestCase):
+    def test_bounds_are_finite(self):
+        env = MusEnv()
+        high = env.observation_space.high
+        self.assertTrue((high < np.iinfo(np.int16).max).all())
+        self.assertEqual(int(high[OBS_SCORES].max()), 2 * env.game.target_score - 1)
+
+    def test_observations_stay_in_space(self):
+        for use_dict_obs in (False, True):
+            env = MusEnv(use_dict_obs=use_dict_obs)
+            obs = env.reset()
+            for _ in range(300):
+                self.assertTrue(env.observation_space.contains(
+                    {field: value[0] for field, value in obs.items()} if use_dict_obs else obs[0]))
+                obs, _, dones, _ = env.step({p: env.fast_sample() for p in range(env.num_players)})
+                if dones.all():
+                    obs = env.reset()
+
+def _filter(phase, action_types):
+    """Run _process_actions on one action of each given type, with fixed fields."""
+    n = len(action_types)
+    outputs = (np.zeros(n, dtype=np.int8), np.zeros(n, dtype=np.int8),
+               np.zeros((n, 4), dtype=np.uint8), np.zeros(n, dtype=np.int8))
+    # Stale values, which every call must overwrite.
+    outputs[1].fill(9)
+    outputs[3].fill(9)
+    acted = _process_actions(int(phase), np.array(action_types, dtype=np.int8),
+                             np.full(n, 3, dtype=np.int8), np.ones((n, 4), dtype=np.uint8),
+                             np.full(n, 2, dtype=np.int8), *outputs)
+    return (acted,) + outputs
+
+class BettingFieldsTest(unittest.TestCase):
+    """The current bet's observation bound relies on steps never returning in the play phase."""
+
+    def test_steps_never_return_in_play(self):
+        for num_players in (2, 4):
+            env = MusEnv(num_players=num_players)
+            obs = env.reset()
+            for _ in range(300):
+                self.assertNotEqual(env.game.current_phase, Phase.PLAY)
+                self.assertTrue((obs[:, OBS_PHASE] != Phase.PLAY).all())
+                self.assertTrue((obs[:, OBS_CURRENT_BET] == 0).all())
+                self.assertTrue((obs[:, OBS_CURRENT_CATEGORY] == -1).all())
+                obs, _, dones, _ = env.step({p: env.fast_sample() for p in range(num_players)})
+                if dones.all():
+                    obs = env.reset()
+
+class ProcessActionsTest(unittest.TestCase):
+    ALL_TYPES = [-1, 0, 1, 2, 3, 4, 5]
+
+    def test_mus_phase_keeps_discards_and_signals(self):
+        acted, types, amounts, cards, signals = _filter(Phase.MUS, self.ALL_TYPES)
+        self.assertEqual(types.tolist(), [-1, 0, -1, -1, -1, -1, 5])
+        self.assertEqual(acted, 0b1000010)
+        self.assertEqual(cards.sum(axis=1).tolist(), [0, 4, 0, 0, 0, 0, 0])
+        self.assertEqual(signals.tolist(), [0, 0, 0, 0, 0, 0, 2])
+        self.assertFalse(amounts.any())
+
+    def test_play_phase_keeps_betting_actions(self):
+        acted, types, amounts, cards, signals = _filter(Phase.PLAY, self.ALL_TYPES)
+        self.assertEqual(types.tolist(), [-1, -1, 1, 2, 3, 4, -1])
+        self.assertEqual(acted, 0b0111100)
+        # Only bets and raises carry an amount.
+        self.assertEqual(amounts.tolist(), [0, 0, 3, 3, 0, 0, 0])
+        self.assertFalse(cards.any())
+        self.assertFalse(signals.any())
+
+    def test_other_phases_drop_everything(self):
+        for phase in (Phase.DEAL, Phase.SCORING):
+            acted, types, amounts, cards, signals = _filter(phase, self.ALL_TYPES)
+            self.assertEqual(acted, 0)
+            self.assertTrue((types == -1).all())
+            self.assertFalse(amounts.any() or cards.any() or signals.any())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# tests/test_subproc_mus_env.py
+"""Lifecycle tests for the subprocess-backed environments."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+from subproc_mus_env import ExternalProcessMusEnv, SubprocVectorMusEnv, _shared_arrays
+from vector_mus_env import VectorMusEnv
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Trainer-style script: a local env (which shuffles a deck pool) exists before
+# the worker processes are started. {close} is replaced by the shutdown code.
+_SCRIPT = """
+from vector_mus_env import VectorMusEnv
+from subproc_mus_env import SubprocVectorMusEnv
+
+if __name__ == '__main__':
+    VectorMusEnv(3)
+    env = SubprocVectorMusEnv(4, num_workers=2)
+    env.step([{{}}] * 4)
+    {close}
+"""
+
+class ProcessExitTest(unittest.TestCase):
+    """Run a whole parent process and check that it exits cleanly."""
+
+    def _run(self, close):
+        result = subprocess.run([sys.executable, '-c', _SCRIPT.format(close=close)], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn('leaked', result.stderr)
+        self.assertNotIn('Traceback', result.stderr)
+
+    def test_exits_after_close(self):
+        self._run('env.close()')
+
+    def test_exits_without_close(self):
+        self._run('pass')
+
+class SubprocVectorMusEnvTest(unittest.TestCase):
+    def test_matches_local_layout(self):
+        VectorMusEnv(2)
+        with SubprocVectorMusEnv(5, num_workers=2) as env:
+            obs, rewards, dones, infos = env.step([{}] * 5)
+            self.assertEqual(obs['hand'].shape, (5, 4, 4))
+            self.assertEqual(rewards.shape, (5, 4))
+            self.assertEqual(dones.shape, (5, 4))
+            self.assertEqual(len(infos), 5)
+            # Every game has dealt four valid cards to each player.
+            self.assertTrue(((obs['hand'] >= 2) & (obs['hand'] <= 9)).all())
+
+    def test_close_twice(self):
+        env = SubprocVectorMusEnv(2, num_workers=1)
+        env.close()
+        env.close()
+
+    def test_shared_arrays_do_not_overlap(self):
+        num_envs, num_players = 3, 4
+        size = _shared_arrays(None, num_envs, num_players)
+        buffer = bytearray(size)
+        obs, rewards, dones = _shared_arrays(buffer, num_envs, num_players)
+        self.assertEqual(rewards.ctypes.data % 4, 0)
+        obs.fill(-1)
+        rewards.fill(0)
+        dones.fill(False)
+        self.assertTrue((obs == -1).all())
+        rewards.fill(1)
+        dones.fill(True)
+        self.assertTrue((obs == -1).all())
+        self.assertTrue((rewards == 1).all())
+
+class ExternalProcessMusEnvTest(unittest.TestCase):
+    def test_worker_survives_errors(self):
+        with ExternalProcessMusEnv() as env:
+            with self.assertRaisesRegex(RuntimeError, 'no attribute'):
+                env.call('no_such_method')()
+            with self.assertRaises(RuntimeError):
+                env.call('step', None)()
+            # The worker still answers after the failed calls.
+            self.assertEqual(env.num_players, 4)
+            obs = env.reset()
+            self.assertIsInstance(obs, np.ndarray)
+
+if __name__ == '__main__':
+    unittest.main()
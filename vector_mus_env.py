@@ -0,0 +1,85 @@
+# vector_mus_env.py
+"""
+This module implements a batched version of the Mus environment.
+VectorMusEnv steps several MusGame instances per call and returns the results
+as NumPy arrays stacked across environments (one leading axis per environment),
+so an agent can run a single batched forward pass for all games.
+"""
+
+import numpy as np
+from cards import DeckPool
+from game_logic import MusGame, observation_size, observation_views
+
+class VectorMusEnv:
+    """
+    Holds num_envs independent Mus games and steps them together.
+    Observations, rewards and dones are written into arrays allocated once in
+    __init__ and returned on every call, so copy them if they must be kept.
+    """
+    def __init__(self, num_envs, num_players=4, signal_intercept_chance=0.2, deck_pool=None):
+        """
+        :param deck_pool: Optional DeckPool to deal from; by default one is built
+            and shared by the games of this batch.
+        """
+        self.num_envs = num_envs
+        self.num_players = num_players
+        # Pre-shuffled decks shared by every game; each reset takes the next one.
+        self.deck_pool = deck_pool if deck_pool is not None else DeckPool()
+        # reset() below loads each game's first deck.
+        self.games = [MusGame(num_players=num_players, signal_intercept_chance=signal_intercept_chance,
+                              shuffle=False)
+                      for _ in range(num_envs)]
+        # Flat observations of every player in every game (see game_logic.OBS_*).
+        self._obs = np.zeros((num_envs, num_players, observation_size(num_players)), dtype=np.int16)
+        self._observations = observation_views(self._obs)
+        self._rewards = np.zeros((num_envs, num_players), dtype=np.float32)
+        self._dones = np.zeros((num_envs, num_players), dtype=bool)
+        # Game observation versions of the rows currently in self._obs (see MusGame.observation_version).
+        self._obs_stamps = [[None] * num_players for _ in range(num_envs)]
+        self.reset()
+
+    def reset(self, indices=None):
+        """
+        Start new games in the given environments (all of them by default).
+        Returns the dict of stacked observations, each of shape (num_envs, num_players, ...).
+        """
+        if indices is None:
+            indices = range(self.num_envs)
+        for i in indices:
+            game = self.games[i]
+            game.reset_from_deck(self.deck_pool.next_deck())
+            game.initial_deal()
+            self._dones[i] = False
+            self._write_observations(i)
+        return self._observations
+
+    def _write_observations(self, i):
+        """Copy each player's observation of game i into the stacked buffer if it changed."""
+        game = self.games[i]
+        obs = self._obs[i]
+        stamps = self._obs_stamps[i]
+        for player in range(self.num_players):
+            stamp = game.observation_version(player)
+            if stamps[player] != stamp:
+                obs[player] = game.get_observation_array(player)
+                stamps[player] = stamp
+
+    def step(self, actions_batch):
+        """
+        Step every game with its own actions.
+        Parameters:
+            actions_batch: Sequence of num_envs action dicts, each mapping player IDs
+                to action dictionaries as accepted by MusGame.step().
+        Returns:
+            observations (dict of arrays), rewards (num_envs, num_players),
+            dones (num_envs, num_players), and infos (list of per-game dicts holding
+            the signals intercepted during this step).
+        """
+        infos = []
+        for i, (game, actions) in enumerate(zip(self.games, actions_batch)):
+            game.step(actions)
+            self._write_observations(i)
+            game.get_rewards(self._rewards[i])
+            self._dones[i] = game.is_terminal()
+            infos.append({'intercepted': game.last_intercepted})
+        return self._observations, self._rewards, self._dones, infos